@@ -1,75 +1,389 @@
+import os
 import csv
+import time
+import argparse
+from pathlib import Path
 
-print("Welcome to GradeBook")
-
-while True:
-    print("\n1. Add Data")
-    print("2. Show Data")
-    print("3. Exit")
-    ch = input("Enter your choice: ")
-
-    if ch == "1":
-        data = []
-        while True:
-            name = input("\nEnter student name (or 'done' to stop): ")
-            if name.lower() == "done":
-                break
-
-            m1 = float(input("Marks in Subject 1: "))
-            m2 = float(input("Marks in Subject 2: "))
-            m3 = float(input("Marks in Subject 3: "))
-            m4 = float(input("Marks in Subject 4: "))
-
-            avg = (m1 + m2 + m3 + m4) / 4
-
-            if avg >= 90:
-                g = "A"
-            elif avg >= 80:
-                g = "B"
-            elif avg >= 70:
-                g = "C"
-            elif avg >= 60:
-                g = "D"
-            else:
-                g = "F"
-
-            data.append([name, m1, m2, m3, m4, avg, g])
-
-       
-        print("\n==============================================")
-        print("Name\tSub1\tSub2\tSub3\tSub4\tAvg\tGrade")
-        print("==============================================")
-        for s in data:
-            print(f"{s[0]}\t{s[1]}\t{s[2]}\t{s[3]}\t{s[4]}\t{s[5]:.2f}\t{s[6]}")
-        print("==============================================")
-
-        f = open("marks.csv", "a", newline="")
-        w = csv.writer(f)
-        for s in data:
-            w.writerow(s)
-        f.close()
+import numpy as np
+
+# Grade boundaries: an average >= 90 is an A, >= 80 a B, ... below 60 an F
+GRADE_CUTOFFS = np.array([60, 70, 80, 90])
+GRADE_LETTERS = np.array(list("FDCBA"))
+
+# marks.csv starts with this line and a header row. Version 1 files had neither.
+SCHEMA_VERSION = 2
+SCHEMA_PREFIX = "# gradebook schema "
+SUMMARY_COLUMNS = {"avg", "average", "grade"}
+
+
+def letter_grades(averages):
+    """Maps an array of averages to letter grades with one searchsorted call."""
+    return GRADE_LETTERS[np.searchsorted(GRADE_CUTOFFS, averages, side="right")]
+
+
+class Gradebook:
+    """
+    Marks for a cohort held as one students x subjects float matrix, so
+    averages, grades, class statistics, ranks and percentiles are computed
+    for every student at once instead of row by row.
+    """
+    def __init__(self, subjects):
+        self.subjects = list(subjects)
+        self.names = []
+        self.marks = np.empty((0, len(self.subjects)))
+
+    def add_students(self, names, marks):
+        marks = np.asarray(marks, dtype=float).reshape(len(names), len(self.subjects))
+        self.names.extend(names)
+        self.marks = np.vstack([self.marks, marks])
+
+    def add_student(self, name, marks):
+        self.add_students([name], [marks])
+
+    def __len__(self):
+        return len(self.names)
+
+    def averages(self):
+        return self.marks.mean(axis=1)
+
+    def grades(self):
+        return letter_grades(self.averages())
+
+    def ranks(self):
+        """Rank 1 is the highest average; tied students share a rank."""
+        averages = self.averages()
+        ordered = np.sort(averages)
+        return len(averages) - np.searchsorted(ordered, averages, side="right") + 1
+
+    def percentiles(self):
+        """Percentage of the class with an average at or below each student's."""
+        averages = self.averages()
+        ordered = np.sort(averages)
+        return 100.0 * np.searchsorted(ordered, averages, side="right") / len(averages)
+
+    def class_stats(self):
+        """Mean, median, spread and range per subject and for the average, plus the grade counts."""
+        columns = np.column_stack([self.marks, self.averages()])
+        stats = {}
+        for i, name in enumerate(self.subjects + ["Average"]):
+            column = columns[:, i]
+            stats[name] = {
+                "mean": column.mean(),
+                "median": np.median(column),
+                "std": column.std(),
+                "min": column.min(),
+                "max": column.max(),
+            }
+        letters, counts = np.unique(self.grades(), return_counts=True)
+        grade_counts = dict.fromkeys(GRADE_LETTERS[::-1], 0)
+        grade_counts.update(zip(letters, counts.tolist()))
+        return stats, grade_counts
+
+    def rows(self):
+        """[name, marks..., average, grade] for every student."""
+        averages = self.averages()
+        grades = letter_grades(averages)
+        for i, name in enumerate(self.names):
+            yield [name, *self.marks[i].tolist(), round(float(averages[i]), 2), str(grades[i])]
+
+
+def default_subjects(n_subjects):
+    return [f"Sub{i}" for i in range(1, n_subjects + 1)]
+
+
+def read_marks_schema(path):
+    """
+    Returns (subjects, version) for a saved marks file, or (None, None) if it
+    is missing or empty. Headerless version 1 files get Sub1..SubN names.
+    """
+    try:
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if not row:
+                    continue
+                if row[0].startswith(SCHEMA_PREFIX):
+                    header = next(csv.reader(f))
+                    return header[1:-2], int(row[0][len(SCHEMA_PREFIX):])
+                return default_subjects(len(row) - 3), 1
+    except FileNotFoundError:
+        pass
+    return None, None
+
+
+def load_marks(path="marks.csv"):
+    """
+    Reads saved rows (name, marks..., average, grade) into a Gradebook.
+    Rows whose width does not match the file's subjects are skipped.
+    """
+    subjects, version = read_marks_schema(path)
+    if not subjects:
+        return Gradebook([])
+    names, marks = [], []
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        if version > 1:
+            next(reader)
+            next(reader)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != len(subjects) + 3:
+                print(f"Skipping row with an unexpected number of columns: {row}")
+                continue
+            names.append(row[0])
+            marks.append([float(m) for m in row[1:1 + len(subjects)]])
+    book = Gradebook(subjects)
+    if names:
+        book.add_students(names, marks)
+    return book
+
+
+def open_marks_for_append(path, subjects):
+    """
+    Opens a marks file for appending rows for these subjects through one large
+    buffer. A new file gets the schema line and header first. A version 1 file
+    is upgraded in place; a file for a different number of subjects is refused.
+    Returns (file, subjects as named in the file).
+    """
+    existing, version = read_marks_schema(path)
+    if existing is not None and len(existing) != len(subjects):
+        raise ValueError(f"{path} holds {len(existing)} subjects, the new rows have {len(subjects)}")
+    if existing is None:
+        with open(path, "w", newline="") as f:
+            f.write(f"{SCHEMA_PREFIX}{SCHEMA_VERSION}\n")
+            csv.writer(f).writerow(["Name", *subjects, "Avg", "Grade"])
+        existing = subjects
+    elif version == 1:
+        tmp_path = f"{path}.tmp"
+        with open(path, newline="") as src, open(tmp_path, "w", newline="") as dst:
+            dst.write(f"{SCHEMA_PREFIX}{SCHEMA_VERSION}\n")
+            writer = csv.writer(dst)
+            writer.writerow(["Name", *existing, "Avg", "Grade"])
+            writer.writerows(row for row in csv.reader(src) if row)
+        os.replace(tmp_path, path)
+    return open(path, "a", newline="", buffering=1 << 20), existing
+
+
+def save_marks(book, path="marks.csv"):
+    f, _ = open_marks_for_append(path, book.subjects)
+    with f:
+        csv.writer(f).writerows(book.rows())
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _parse_marks(row, mark_columns):
+    """Returns (name, marks) for a valid row, or raises ValueError with the reason."""
+    name = row[0].strip() if row else ""
+    if not name:
+        raise ValueError("missing name")
+    marks = []
+    for i in mark_columns:
+        if i >= len(row):
+            raise ValueError(f"expected {len(mark_columns)} marks, got {len(row) - 1}")
+        try:
+            mark = float(row[i])
+        except ValueError:
+            raise ValueError(f"non-numeric mark {row[i]!r}")
+        if not 0 <= mark <= 100:
+            raise ValueError(f"mark {row[i]} outside 0-100")
+        marks.append(mark)
+    return name, marks
+
+
+def import_csv(input_path, output_path="marks.csv", rejects_path=None, chunk_size=10_000):
+    """
+    Streams a roster or marks CSV into the marks file, chunk_size rows at a time.
+
+    The input may have a header (name column, subject columns, and optional
+    Avg/Average/Grade columns, which are recomputed) or be headerless, with
+    every column after the name being a mark. Headerless saved-marks rows
+    ending in a letter grade also work. Each chunk is graded as one Gradebook
+    and appended through a single buffered writer. Rows with missing,
+    non-numeric or out-of-range marks go to the reject file with the reason.
+    """
+    start = time.perf_counter()
+    if rejects_path is None:
+        rejects_path = Path(input_path).with_suffix(".rejects.csv")
+    stats = {"read": 0, "imported": 0, "rejected": 0}
+    rejects_file = reject_writer = None
+
+    with open(input_path, newline="") as src:
+        # Skip the schema line when importing a saved marks file
+        reader = csv.reader(line for line in src if not line.startswith(SCHEMA_PREFIX))
+        first = next(reader, None)
+        if first is None:
+            stats["seconds"] = time.perf_counter() - start
+            return stats
+        if len(first) > 1 and _is_number(first[1]):
+            # Headerless: a trailing letter grade means saved marks rows
+            width = len(first) - 2 if not _is_number(first[-1]) else len(first)
+            mark_columns = list(range(1, width))
+            subjects = default_subjects(len(mark_columns))
+            pending = [first]
+        else:
+            mark_columns = [i for i, c in enumerate(first) if i and c.strip().lower() not in SUMMARY_COLUMNS]
+            subjects = [first[i].strip() for i in mark_columns]
+            pending = []
+        if not mark_columns:
+            raise ValueError(f"{input_path} has no mark columns")
+
+        out, subjects = open_marks_for_append(output_path, subjects)
+        with out:
+            writer = csv.writer(out)
+            rows = iter(pending)
+            line = 0 if pending else 1
+            while True:
+                names, marks = [], []
+                for row in rows:
+                    line += 1
+                    if not row:
+                        continue
+                    stats["read"] += 1
+                    try:
+                        name, row_marks = _parse_marks(row, mark_columns)
+                    except ValueError as e:
+                        if reject_writer is None:
+                            rejects_file = open(rejects_path, "w", newline="")
+                            reject_writer = csv.writer(rejects_file)
+                            reject_writer.writerow(["line", "reason", "row"])
+                        reject_writer.writerow([line, str(e), *row])
+                        stats["rejected"] += 1
+                        continue
+                    names.append(name)
+                    marks.append(row_marks)
+                    if len(names) >= chunk_size:
+                        break
+                if rows is not reader:
+                    rows = reader
+                    if len(names) < chunk_size:
+                        continue_reading = True
+                    else:
+                        continue_reading = False
+                else:
+                    continue_reading = False
+                if names:
+                    chunk = Gradebook(subjects)
+                    chunk.add_students(names, marks)
+                    writer.writerows(chunk.rows())
+                    stats["imported"] += len(names)
+                if not names and not continue_reading:
+                    break
+    if rejects_file is not None:
+        rejects_file.close()
+    stats["rejects_path"] = str(rejects_path) if stats["rejected"] else None
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def print_table(book, with_rank=False):
+    header = "Name\t" + "\t".join(book.subjects) + "\tAvg\tGrade"
+    if with_rank:
+        header += "\tRank\tPct"
+    ranks = book.ranks() if with_rank else None
+    percentiles = book.percentiles() if with_rank else None
+    line = "=" * max(46, len(header.expandtabs()))
+    print("\n" + line)
+    print(header)
+    print(line)
+    for i, s in enumerate(book.rows()):
+        text = s[0] + "\t" + "\t".join(str(m) for m in s[1:-2]) + f"\t{s[-2]:.2f}\t{s[-1]}"
+        if with_rank:
+            text += f"\t{ranks[i]}\t{percentiles[i]:.0f}"
+        print(text)
+    print(line)
+
+
+def print_class_stats(book):
+    stats, grade_counts = book.class_stats()
+    print("\nClass statistics")
+    print("Subject\tMean\tMedian\tStd\tMin\tMax")
+    for name, s in stats.items():
+        print(f"{name}\t{s['mean']:.2f}\t{s['median']:.2f}\t{s['std']:.2f}\t{s['min']:.1f}\t{s['max']:.1f}")
+    print("Grades: " + ", ".join(f"{g}={n}" for g, n in grade_counts.items()))
+
+
+def add_data():
+    subjects, _ = read_marks_schema("marks.csv")
+    default = len(subjects) if subjects else 4
+    n_subjects = int(input(f"Number of subjects (default {default}): ") or default)
+    book = Gradebook(subjects if subjects and n_subjects == default else default_subjects(n_subjects))
+    while True:
+        name = input("\nEnter student name (or 'done' to stop): ")
+        if name.lower() == "done":
+            break
+        marks = [float(input(f"Marks in Subject {i}: ")) for i in range(1, n_subjects + 1)]
+        book.add_student(name, marks)
+
+    if len(book):
+        print_table(book)
+        try:
+            save_marks(book)
+        except ValueError as e:
+            print(f"\nNot saved: {e}")
+            return
         print("\nSaved to marks.csv")
 
-    elif ch == "2":
+
+def show_data():
+    try:
+        book = load_marks()
+    except FileNotFoundError:
+        print("\nFile not found!")
+        return
+    if len(book) == 0:
+        print("\nNo data found!")
+        return
+    print_table(book, with_rank=True)
+    print_class_stats(book)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GradeBook")
+    parser.add_argument("--import", dest="import_path", metavar="CSV",
+                        help="grade every row of a roster/marks CSV without prompting and exit")
+    parser.add_argument("--output", default="marks.csv", help="marks file to append to")
+    parser.add_argument("--rejects", help="file for malformed rows (default <input>.rejects.csv)")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="rows graded per batch")
+    args = parser.parse_args(argv)
+
+    if args.import_path:
         try:
-            f = open("marks.csv")
-            r = csv.reader(f)
-            rows = list(r)
-            if len(rows) == 0:
-                print("\nNo data found!")
-            else:
-                print("\n==============================================")
-                print("Name\tSub1\tSub2\tSub3\tSub4\tAvg\tGrade")
-                print("==============================================")
-                for s in rows:
-                    print(f"{s[0]}\t{s[1]}\t{s[2]}\t{s[3]}\t{s[4]}\t{s[5]}\t{s[6]}")
-                print("==============================================")
-            f.close()
-        except:
-            print("\nFile not found!")
-
-    elif ch == "3":
-        print("Goodbye!")
-        break
-    else:
-        print("Invalid choice, try again.")
+            stats = import_csv(args.import_path, args.output, args.rejects, args.chunk_size)
+        except (OSError, ValueError) as e:
+            print(f"Import failed: {e}")
+            return
+        rate = stats["read"] / stats["seconds"] if stats["seconds"] else 0
+        print(f"Imported {stats['imported']} of {stats['read']} rows into {args.output} "
+              f"in {stats['seconds']:.2f}s ({rate:.0f} rows/s)")
+        if stats["rejected"]:
+            print(f"{stats['rejected']} malformed rows written to {stats['rejects_path']}")
+        return
+
+    print("Welcome to GradeBook")
+
+    while True:
+        print("\n1. Add Data")
+        print("2. Show Data")
+        print("3. Exit")
+        ch = input("Enter your choice: ")
+
+        if ch == "1":
+            add_data()
+        elif ch == "2":
+            show_data()
+        elif ch == "3":
+            print("Goodbye!")
+            break
+        else:
+            print("Invalid choice, try again.")
+
+
+if __name__ == "__main__":
+    main()
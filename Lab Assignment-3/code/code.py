@@ -1,17 +1,131 @@
+import os
+import csv
 import json
+import sqlite3
+import argparse
+import time
+import queue
+import random
+import bisect
+import mmap
+import struct
 import logging
+import functools
+import itertools
+import tempfile
+import threading
+import multiprocessing
+from collections import defaultdict
 from pathlib import Path
+from concurrent.futures import Future
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+logger = logging.getLogger("library")
+
+
+def setup_logging(path="library.log", max_bytes=1_000_000, backup_count=5, level=logging.INFO):
+    """Sends library log records to a rotating file through a background thread.
+
+    Callers only put records on an in-memory queue; a QueueListener thread
+    does the file writes and rotation. Returns the listener, which must be
+    stopped to flush the remaining records.
+    """
+    log_queue = queue.SimpleQueue()
+    file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    listener = QueueListener(log_queue, file_handler)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+    listener.start()
+    return listener
+
+
+class LatencyHistogram:
+    """Thread-safe per-operation latency counts in fixed millisecond buckets."""
+
+    BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000, float("inf"))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: [0] * len(self.BOUNDS_MS))
+
+    def record(self, op, seconds):
+        bucket = bisect.bisect_left(self.BOUNDS_MS, seconds * 1000)
+        with self._lock:
+            self._counts[op][bucket] += 1
+
+    def count(self, op):
+        with self._lock:
+            return sum(self._counts[op]) if op in self._counts else 0
+
+    def percentile(self, op, q):
+        """Upper bound in ms of the bucket holding the q-th percentile."""
+        with self._lock:
+            counts = list(self._counts.get(op, ()))
+        total = sum(counts)
+        if not total:
+            return None
+        seen = 0
+        for bound, n in zip(self.BOUNDS_MS, counts):
+            seen += n
+            if seen >= total * q / 100:
+                return bound
+
+    def report(self, width=40):
+        with self._lock:
+            counts = {op: list(c) for op, c in self._counts.items()}
+        lines = []
+        for op in sorted(counts):
+            total = sum(counts[op])
+            lines.append(f"{op}: {total} ops, p50 <= {self.percentile(op, 50)} ms, "
+                         f"p99 <= {self.percentile(op, 99)} ms")
+            peak = max(counts[op])
+            for bound, n in zip(self.BOUNDS_MS, counts[op]):
+                if n:
+                    label = f"<= {bound:g} ms" if bound != float("inf") else "> 1000 ms"
+                    lines.append(f"  {label:>12} {n:8d} {'#' * max(1, n * width // peak)}")
+        return "\n".join(lines)
+
+
+OP_LATENCY = LatencyHistogram()
+
+
+def log_operation(op, isbn, ok, seconds):
+    """Records one desk operation in OP_LATENCY and as a structured log record."""
+    OP_LATENCY.record(op, seconds)
+    if logger.isEnabledFor(logging.INFO):
+        latency_ms = seconds * 1000
+        logger.info("op=%s isbn=%s ok=%s latency_ms=%.3f", op, isbn, ok, latency_ms,
+                    extra={"op": op, "isbn": isbn, "ok": ok, "latency_ms": latency_ms})
+
+
+def timed_operation(op):
+    """Decorates an inventory method taking a Book or ISBN so each call is logged and timed."""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, item, *args, **kwargs):
+            start = time.perf_counter()
+            ok = method(self, item, *args, **kwargs)
+            log_operation(op, getattr(item, "isbn", item), ok, time.perf_counter() - start)
+            return ok
+        return wrapper
+    return decorate
 
-# Configure logging
-logging.basicConfig(filename='library.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
 
 class Book:
-    def __init__(self, title, author, isbn, status="available"):
+    def __init__(self, title, author, isbn, status="available", version=0):
         self.title = title
         self.author = author
         self.isbn = isbn
         self.status = status
+        # Bumped on every status change, for optimistic version checks
+        self.version = version
 
     def __str__(self):
         return f"{self.title} by {self.author} | ISBN: {self.isbn} | Status: {self.status}"
@@ -22,17 +136,20 @@ class Book:
             "author": self.author,
             "isbn": self.isbn,
             "status": self.status,
+            "version": self.version,
         }
 
     def issue(self):
         if self.status == "available":
             self.status = "issued"
+            self.version += 1
             return True
         return False
 
     def return_book(self):
         if self.status == "issued":
             self.status = "available"
+            self.version += 1
             return True
         return False
 
@@ -40,53 +157,1293 @@ class Book:
         return self.status == "available"
 
 
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TextIndex:
+    """Substring index over short strings: word tokens plus character trigrams.
+
+    candidates() narrows a query down to the keys that can contain it; callers
+    still confirm the match. Queries of three or more characters intersect the
+    trigram postings. Shorter queries cannot span a space, so they only need
+    the vocabulary of words rather than every book.
+    """
+
+    def __init__(self):
+        self.tokens = defaultdict(set)
+        self.grams = defaultdict(set)
+
+    def add(self, key, text):
+        text = text.lower()
+        for token in set(text.split()):
+            self.tokens[token].add(key)
+        for gram in trigrams(text):
+            self.grams[gram].add(key)
+
+    def candidates(self, query):
+        """Returns a set of candidate keys, or None if every key must be checked."""
+        query = query.lower()
+        if len(query) >= 3:
+            postings = sorted((self.grams.get(g, set()) for g in trigrams(query)), key=len)
+            return set.intersection(*postings)
+        if query and not any(c.isspace() for c in query):
+            matches = set()
+            for token, keys in self.tokens.items():
+                if query in token:
+                    matches |= keys
+            return matches
+        return None
+
+
+def _file_stamp(path):
+    """(size, mtime_ns) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class CatalogSnapshot:
+    """Read-only, memory-mapped binary copy of a JSON catalog.
+
+    Layout: a magic string, a length-prefixed JSON header (catalog stamp,
+    book count, ISBN width, status counts), one 8-byte record offset per book
+    in catalog order, an ISBN index of fixed-width (padded ISBN, offset)
+    entries sorted by ISBN, and finally one compact JSON line per book.
+    Opening it only parses the header. get() binary-searches the mapped
+    index and decodes a single record, so nothing scales with catalog size
+    until a book is actually needed.
+    """
+
+    MAGIC = b"LIBSNAP1"
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(self.MAGIC)] != self.MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a catalog snapshot")
+        start = len(self.MAGIC) + 4
+        (meta_len,) = struct.unpack_from("<I", self._mm, len(self.MAGIC))
+        meta = json.loads(self._mm[start:start + meta_len])
+        self.stamp = meta["stamp"]
+        self.count = meta["count"]
+        self.status_counts = meta["status_counts"]
+        self._width = meta["width"]
+        self._entry = struct.Struct(f"<{self._width}sQ")
+        self._offsets_start = start + meta_len
+        self._index_start = self._offsets_start + 8 * self.count
+
+    @classmethod
+    def open(cls, path):
+        """Returns the snapshot at path, or None if it is missing or unreadable."""
+        try:
+            return cls(path)
+        except (OSError, ValueError, KeyError) as e:
+            if Path(path).exists():
+                logger.info("Ignoring unreadable snapshot %s: %s", path, e)
+            return None
+
+    @classmethod
+    def write(cls, path, records, stamp):
+        """Atomically writes records (book dicts in catalog order) as a snapshot."""
+        lines = [json.dumps(r, separators=(',', ':')).encode() + b"\n" for r in records]
+        isbns = [r["isbn"].encode() for r in records]
+        width = max(map(len, isbns), default=1)
+        status_counts = defaultdict(int)
+        for r in records:
+            status_counts[r["status"]] += 1
+        meta = json.dumps({"stamp": stamp, "count": len(lines), "width": width,
+                           "status_counts": status_counts}).encode()
+        entry = struct.Struct(f"<{width}sQ")
+        offset = len(cls.MAGIC) + 4 + len(meta) + (8 + entry.size) * len(lines)
+        offsets = []
+        for line in lines:
+            offsets.append(offset)
+            offset += len(line)
+        order = sorted(range(len(lines)), key=isbns.__getitem__)
+
+        tmp_path = Path(path).with_name(Path(path).name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(cls.MAGIC + struct.pack("<I", len(meta)) + meta)
+            f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            f.write(b"".join(entry.pack(isbns[i], offsets[i]) for i in order))
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, offset):
+        return json.loads(self._mm[offset:self._mm.find(b"\n", offset)])
+
+    def record_at(self, position):
+        """The record at a catalog position."""
+        (offset,) = struct.unpack_from("<Q", self._mm, self._offsets_start + 8 * position)
+        return self._record(offset)
+
+    def get(self, isbn):
+        """The record for isbn, or None."""
+        key = isbn.encode()
+        if len(key) > self._width:
+            return None
+        key = key.ljust(self._width, b"\0")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, offset = self._entry.unpack_from(self._mm, self._index_start + mid * self._entry.size)
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return self._record(offset)
+        return None
+
+    def __iter__(self):
+        """Yields every record in catalog order."""
+        if not self.count:
+            return
+        (offset,) = struct.unpack_from("<Q", self._mm, self._offsets_start)
+        end = len(self._mm)
+        while offset < end:
+            newline = self._mm.find(b"\n", offset)
+            yield json.loads(self._mm[offset:newline])
+            offset = newline + 1
+
+
+SORT_KEYS = ("title", "author", "status")
+
+
 class LibraryInventory:
-    def __init__(self, file_path="catalog.json"):
+    """Book catalog persisted to a JSON snapshot.
+
+    In journal mode each add, issue or return appends one compact record to
+    <catalog>.journal instead of rewriting the whole catalog. The journal is
+    fsynced every `sync_every` records and on close(), so a crash loses at
+    most the unsynced tail. Every `compact_every` records the catalog is
+    compacted into a new snapshot, written to a temp file and renamed into
+    place. On startup load_books() replays the snapshot plus the journal.
+
+    Issue and return are thread-safe: each ISBN maps to one of a fixed set
+    of striped locks, and persistence is serialized separately. An exclusive
+    lock file keeps a second process from opening the same catalog. Shared
+    multi-process access needs the SQLite backend.
+
+    With fast_start the catalog opens from <catalog>.snap, a CatalogSnapshot
+    stamped with the catalog file it was built from. Books are only built
+    when looked up, and are kept in `_by_isbn` as an overlay over the
+    snapshot. Listing, title/author search and paging in sorted order load
+    the whole catalog on first use. Every snapshot save regenerates the
+    binary snapshot on a background thread. A missing or stale snapshot
+    falls back to a full load. Fast start pairs with journal mode, where
+    changes do not rewrite the catalog.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, file_path="catalog.json", journal=False, sync_every=32, compact_every=1000,
+                 fast_start=False):
         self.file_path = Path(file_path)
+        self.journal_path = self.file_path.with_name(self.file_path.name + ".journal")
+        self.snapshot_path = self.file_path.with_name(self.file_path.name + ".snap")
+        self.journal = journal
+        self.fast_start = fast_start
+        self.sync_every = sync_every
+        self.compact_every = compact_every
+        self._journal_file = None
+        self._unsynced = 0
+        self._journaled = 0
+        self._dirty = False
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._catalog_lock = threading.RLock()
+        self._persist_lock = threading.RLock()
+        self._process_lock = self._lock_catalog_file()
         self.books = []
+        self._by_isbn = {}
+        self._position = {}
+        self._by_status = defaultdict(set)
+        self._titles = TextIndex()
+        self._authors = TextIndex()
+        self._sorted = {}
+        self._snapshot = None
+        self._loaded = True
+        self._added = []
+        self._status_delta = defaultdict(int)
+        self._regen_lock = threading.Lock()
+        self._regen_pending = None
+        self._regen_thread = None
         self.load_books()
 
+    def _lock_catalog_file(self):
+        if fcntl is None:
+            return None
+        lock_file = open(self.file_path.with_name(self.file_path.name + ".lock"), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"{self.file_path} is open in another process; "
+                               "use the SQLite backend for shared access.")
+        return lock_file
+
+    def _lock_for(self, isbn):
+        return self._locks[hash(isbn) % self.LOCK_STRIPES]
+
+    def _index_book(self, book):
+        """Adds a book to the list and every index. Returns False for a duplicate ISBN."""
+        if not self._loaded:
+            if self.search_by_isbn(book.isbn) is not None:
+                return False
+            self._by_isbn[book.isbn] = book
+            self._added.append(book)
+            self._status_delta[book.status] += 1
+            return True
+        if book.isbn in self._by_isbn:
+            return False
+        self._position[book.isbn] = len(self.books)
+        self.books.append(book)
+        self._by_isbn[book.isbn] = book
+        self._by_status[book.status].add(book.isbn)
+        self._titles.add(book.isbn, book.title)
+        self._authors.add(book.isbn, book.author)
+        self._sorted.clear()
+        return True
+
+    def _set_status(self, book, old_status):
+        if not self._loaded:
+            self._status_delta[old_status] -= 1
+            self._status_delta[book.status] += 1
+            return
+        self._by_status[old_status].discard(book.isbn)
+        self._by_status[book.status].add(book.isbn)
+        self._sorted.pop("status", None)
+
+    def _apply(self, op, isbn, expected_version=None):
+        """Applies an issue or return to the in-memory catalog."""
+        book = self.search_by_isbn(isbn)
+        if book is None:
+            return False
+        if expected_version is not None and book.version != expected_version:
+            return False
+        old_status = book.status
+        changed = book.issue() if op == "issue" else book.return_book()
+        if changed:
+            self._set_status(book, old_status)
+        return changed
+
     def load_books(self):
+        if self.fast_start:
+            snapshot = CatalogSnapshot.open(self.snapshot_path)
+            if snapshot is not None and snapshot.stamp == _file_stamp(self.file_path):
+                self._snapshot = snapshot
+                self._loaded = False
+                self._replay_journal()
+                return
+            logger.info("Snapshot %s is missing or stale; loading %s.", self.snapshot_path, self.file_path)
         try:
             if self.file_path.exists():
                 with open(self.file_path, 'r') as f:
                     data = json.load(f)
                     for item in data:
-                        self.books.append(Book(**item))
+                        if not self._index_book(Book(**item)):
+                            logger.info("Skipping duplicate ISBN %s in catalog.", item.get('isbn'))
             else:
-                logging.info("Catalog file not found. Creating new one.")
+                logger.info("Catalog file not found. Creating new one.")
         except Exception as e:
-            logging.error(f"Error loading file: {e}")
+            logger.error("Error loading file: %s", e)
+        self._replay_journal()
+        if self.fast_start:
+            self._regenerate_snapshot([b.to_dict() for b in self.books])
+
+    def _replay_journal(self):
+        # Replaying is safe even if the journal predates the snapshot:
+        # duplicate adds are ignored and status records carry the version
+        # they produced.
+        if not self.journal_path.exists():
+            return
+        replayed = 0
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.error("Ignoring truncated journal tail.")
+                    break
+                if record["op"] == "add":
+                    self._index_book(Book(**record["book"]))
+                else:
+                    book = self.search_by_isbn(record["isbn"])
+                    # Skip changes the snapshot already contains
+                    if book is not None and book.version < record.get("version", book.version + 1):
+                        self._apply(record["op"], record["isbn"])
+                replayed += 1
+        logger.info("Replayed %d journal records.", replayed)
+        self._journaled = replayed
+        if not self.journal:
+            # Fold a journal left by an earlier journal-mode run into the snapshot
+            self.save_books()
+
+    def _ensure_loaded(self):
+        """Builds every Book and index from the snapshot plus the overlay."""
+        if self._loaded:
+            return
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            with self._catalog_lock, self._persist_lock:
+                if self._loaded:
+                    return
+                overlay, added = self._by_isbn, self._added
+                self._by_isbn = {}
+                self._loaded = True
+                for record in self._snapshot:
+                    self._index_book(overlay.get(record["isbn"]) or Book(**record))
+                for book in added:
+                    self._index_book(book)
+                self._snapshot = None
+                self._added = []
+                self._status_delta.clear()
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def _book_at(self, position):
+        """The book at a catalog position without loading the catalog."""
+        if position >= len(self._snapshot):
+            return self._added[position - len(self._snapshot)]
+        record = self._snapshot.record_at(position)
+        return self._by_isbn.get(record["isbn"]) or Book(**record)
+
+    def _iter_dicts(self):
+        """Book dicts in catalog order, read from the snapshot where nothing changed."""
+        if self._loaded:
+            for b in self.books:
+                yield b.to_dict()
+            return
+        for record in self._snapshot:
+            book = self._by_isbn.get(record["isbn"])
+            yield book.to_dict() if book is not None else record
+        for book in self._added:
+            yield book.to_dict()
+
+    def _regenerate_snapshot(self, records):
+        """Rewrites the binary snapshot for the catalog file on a background thread.
+
+        Saves that arrive while a snapshot is being written are coalesced:
+        only the newest one is written next.
+        """
+        stamp = _file_stamp(self.file_path)
+        if stamp is None:
+            return
+        with self._regen_lock:
+            self._regen_pending = (records, stamp)
+            if self._regen_thread is None:
+                self._regen_thread = threading.Thread(target=self._regen_worker, daemon=True)
+                self._regen_thread.start()
+
+    def _regen_worker(self):
+        while True:
+            with self._regen_lock:
+                pending, self._regen_pending = self._regen_pending, None
+                if pending is None:
+                    self._regen_thread = None
+                    return
+            try:
+                CatalogSnapshot.write(self.snapshot_path, *pending)
+            except OSError as e:
+                logger.error("Error writing snapshot: %s", e)
 
     def save_books(self):
+        """Writes an atomic snapshot of the catalog and clears the journal."""
+        with self._persist_lock:
+            tmp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+            try:
+                records = list(self._iter_dicts())
+                with open(tmp_path, 'w') as f:
+                    json.dump(records, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.file_path)
+            except Exception as e:
+                logger.error("Error saving file: %s", e)
+                return
+            if self.fast_start:
+                self._regenerate_snapshot(records)
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+            self._unsynced = 0
+            self._journaled = 0
+            self._dirty = False
+
+    def compact(self):
+        self.save_books()
+
+    def _persist(self, record, batched=False):
+        """Journals one mutation, or rewrites the snapshot outside journal mode.
+
+        Batched changes are only made durable by the next commit().
+        """
+        with self._persist_lock:
+            if not self.journal:
+                if batched:
+                    self._dirty = True
+                else:
+                    self.save_books()
+                return
+            if self._journal_file is None:
+                self._journal_file = open(self.journal_path, 'a')
+            self._journal_file.write(json.dumps(record, separators=(',', ':')) + "\n")
+            self._unsynced += 1
+            self._journaled += 1
+            if self._journaled >= self.compact_every:
+                self.compact()
+            elif not batched and self._unsynced >= self.sync_every:
+                self.sync()
+
+    def sync(self):
+        with self._persist_lock:
+            if self._journal_file is not None and self._unsynced:
+                self._journal_file.flush()
+                os.fsync(self._journal_file.fileno())
+            self._unsynced = 0
+
+    def commit(self):
+        """Makes every batched change durable with a single write."""
+        with self._persist_lock:
+            if self.journal:
+                self.sync()
+            elif self._dirty:
+                self.save_books()
+
+    def close(self):
+        self.commit()
+        with self._persist_lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+        regen_thread = self._regen_thread
+        if regen_thread is not None:
+            regen_thread.join()
+        if self._process_lock is not None:
+            self._process_lock.close()
+            self._process_lock = None
+
+    @timed_operation("add")
+    def add_book(self, book):
+        """Adds and saves a book. Returns False if its ISBN is already in the catalog."""
+        with self._catalog_lock:
+            if not self._index_book(book):
+                return False
+        self._persist({"op": "add", "book": book.to_dict()})
+        return True
+
+    def add_books(self, books):
+        """Adds many books with one snapshot write. Returns the number added."""
+        added = 0
+        with self._catalog_lock:
+            for book in books:
+                added += self._index_book(book)
+        if added:
+            self.save_books()
+        return added
+
+    def iter_books(self):
+        self._ensure_loaded()
+        yield from self.books
+
+    def change_status(self, op, isbn, expected_version=None, batched=False):
+        """Issues or returns a book atomically with respect to other threads.
+
+        With expected_version the change only applies if the book is still at
+        that version. Returns True if the status changed.
+        """
+        with self._lock_for(isbn):
+            if not self._apply(op, isbn, expected_version):
+                return False
+            version = self._by_isbn[isbn].version
+            self._persist({"op": op, "isbn": isbn, "version": version}, batched=batched)
+        return True
+
+    @timed_operation("issue")
+    def issue_book(self, isbn, expected_version=None):
+        return self.change_status("issue", isbn, expected_version)
+
+    @timed_operation("return")
+    def return_book(self, isbn, expected_version=None):
+        return self.change_status("return", isbn, expected_version)
+
+    def _search(self, field, query):
+        self._ensure_loaded()
+        index = self._titles if field == "title" else self._authors
+        candidates = index.candidates(query)
+        if candidates is None:
+            books = self.books
+        else:
+            books = [self._by_isbn[isbn] for isbn in sorted(candidates, key=self._position.get)]
+        query = query.lower()
+        return [b for b in books if query in getattr(b, field).lower()]
+
+    def _sort_key(self, sort):
+        if sort is None:
+            return lambda b: self._position[b.isbn]
+        return lambda b: (getattr(b, sort).lower(), self._position[b.isbn])
+
+    def _sorted_books(self, sort):
+        """Books ordered by (sort field, catalog position), cached until the catalog changes."""
+        with self._catalog_lock:
+            cached = self._sorted.get(sort)
+            if cached is None:
+                key = self._sort_key(sort)
+                books = sorted(self.books, key=key)
+                cached = self._sorted[sort] = ([key(b) for b in books], books)
+        return cached
+
+    def page_books(self, query=None, field="title", sort=None, status=None, after=None, page_size=20):
+        """Returns one page of books and the cursor for the next page (None on the last page).
+
+        Books are in catalog order, or ordered by `sort` (title, author or
+        status). `query` keeps books whose `field` contains it and `status`
+        keeps books with that status. `after` is the cursor returned for the
+        previous page; matching books are scanned lazily, so a page costs
+        about page_size matches rather than a pass over the catalog.
+        """
+        if sort is not None and sort not in SORT_KEYS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        if status is not None and not self.status_counts().get(status):
+            return [], None
+        if not self._loaded and sort is None and not query:
+            return self._page_unloaded(status, after, page_size)
+        self._ensure_loaded()
+        key = self._sort_key(sort)
+        candidates = None
+        if query:
+            candidates = (self._titles if field == "title" else self._authors).candidates(query)
+            if candidates is not None and not candidates:
+                return [], None
+
+        if sort is None and candidates is not None:
+            positions = sorted(self._position[isbn] for isbn in candidates)
+            start = bisect.bisect_right(positions, after) if after is not None else 0
+            books = (self.books[p] for p in itertools.islice(positions, start, None))
+        elif sort is None:
+            start = after + 1 if after is not None else 0
+            books = (self.books[p] for p in range(start, len(self.books)))
+        else:
+            keys, ordered = self._sorted_books(sort)
+            start = bisect.bisect_right(keys, tuple(after)) if after is not None else 0
+            books = (ordered[i] for i in range(start, len(ordered)))
+
+        if candidates is not None and sort is not None:
+            books = (b for b in books if b.isbn in candidates)
+        if status is not None:
+            books = (b for b in books if b.status == status)
+        if query:
+            query = query.lower()
+            books = (b for b in books if query in getattr(b, field).lower())
+        page = list(itertools.islice(books, page_size + 1))
+        if len(page) > page_size:
+            return page[:page_size], key(page[page_size - 1])
+        return page, None
+
+    def search_by_title(self, title):
+        return self._search("title", title)
+
+    def search_by_author(self, author):
+        return self._search("author", author)
+
+    def _page_unloaded(self, status, after, page_size):
+        """Catalog-order paging straight from the snapshot."""
+        page, positions = [], []
+        start = after + 1 if after is not None else 0
+        for position in range(start, len(self._snapshot) + len(self._added)):
+            book = self._book_at(position)
+            if status is None or book.status == status:
+                page.append(book)
+                positions.append(position)
+                if len(page) > page_size:
+                    return page[:page_size], positions[page_size - 1]
+        return page, None
+
+    def search_by_isbn(self, isbn):
+        book = self._by_isbn.get(isbn)
+        if book is None and not self._loaded:
+            with self._catalog_lock:
+                if self._loaded:
+                    return self._by_isbn.get(isbn)
+                book = self._by_isbn.get(isbn)
+                if book is None:
+                    record = self._snapshot.get(isbn)
+                    if record is not None:
+                        book = self._by_isbn[isbn] = Book(**record)
+        return book
+
+    def status_counts(self):
+        if not self._loaded:
+            counts = defaultdict(int, self._snapshot.status_counts)
+            for status, delta in self._status_delta.items():
+                counts[status] += delta
+            return {status: count for status, count in counts.items() if count}
+        return {status: len(isbns) for status, isbns in self._by_status.items()}
+
+    def display_all(self, sort=None, status=None, page_size=20):
+        browse(self, sort=sort, status=status, page_size=page_size)
+
+
+class SQLiteInventory:
+    """Book catalog stored in a SQLite database.
+
+    isbn is the primary key, and title and author are indexed, with an FTS5
+    trigram index for substring title/author search where SQLite supports it.
+    Books are loaded row by row on demand, issue/return are single
+    conditional UPDATEs inside a transaction, and WAL mode lets several desk
+    terminals share one database file. The API matches LibraryInventory.
+
+    The UPDATE compares the current status (and, optionally, the version),
+    so concurrent threads or processes can never double-issue a book.
+    """
+
+    def __init__(self, db_path="catalog.db"):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS books ("
+                " isbn TEXT PRIMARY KEY,"
+                " title TEXT NOT NULL,"
+                " author TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'available',"
+                " version INTEGER NOT NULL DEFAULT 0)")
+            columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(books)")]
+            if "version" not in columns:
+                self.conn.execute("ALTER TABLE books ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS books_title ON books(title COLLATE NOCASE)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS books_author ON books(author COLLATE NOCASE)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS books_status ON books(status)")
+            self._create_status_counts()
+        self.fts = self._create_fts()
+
+    def _create_status_counts(self):
+        """Keeps per-status book counts in a table maintained by triggers."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'status_counts'").fetchone()
+        if exists:
+            return
+        self.conn.execute("CREATE TABLE status_counts (status TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+        self.conn.execute(
+            "INSERT INTO status_counts SELECT status, COUNT(*) FROM books GROUP BY status")
+        self.conn.execute(
+            "CREATE TRIGGER status_counts_insert AFTER INSERT ON books BEGIN"
+            " INSERT OR IGNORE INTO status_counts VALUES (new.status, 0);"
+            " UPDATE status_counts SET count = count + 1 WHERE status = new.status;"
+            " END")
+        self.conn.execute(
+            "CREATE TRIGGER status_counts_delete AFTER DELETE ON books BEGIN"
+            " UPDATE status_counts SET count = count - 1 WHERE status = old.status;"
+            " END")
+        self.conn.execute(
+            "CREATE TRIGGER status_counts_update AFTER UPDATE OF status ON books"
+            " WHEN new.status != old.status BEGIN"
+            " UPDATE status_counts SET count = count - 1 WHERE status = old.status;"
+            " INSERT OR IGNORE INTO status_counts VALUES (new.status, 0);"
+            " UPDATE status_counts SET count = count + 1 WHERE status = new.status;"
+            " END")
+
+    def _create_fts(self):
         try:
-            with open(self.file_path, 'w') as f:
-                json.dump([b.to_dict() for b in self.books], f, indent=4)
-        except Exception as e:
-            logging.error(f"Error saving file: {e}")
+            with self.conn:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+                    "title, author, content='books', content_rowid='rowid', tokenize='trigram')")
+                self.conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN"
+                    " INSERT INTO books_fts(rowid, title, author) VALUES (new.rowid, new.title, new.author);"
+                    " END")
+                self.conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN"
+                    " INSERT INTO books_fts(books_fts, rowid, title, author)"
+                    " VALUES ('delete', old.rowid, old.title, old.author);"
+                    " END")
+                self.conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN"
+                    " INSERT INTO books_fts(books_fts, rowid, title, author)"
+                    " VALUES ('delete', old.rowid, old.title, old.author);"
+                    " INSERT INTO books_fts(rowid, title, author) VALUES (new.rowid, new.title, new.author);"
+                    " END")
+            return True
+        except sqlite3.OperationalError as e:
+            logger.info("FTS5 trigram search unavailable, using LIKE: %s", e)
+            return False
 
+    @staticmethod
+    def _book(row):
+        return Book(row["title"], row["author"], row["isbn"], row["status"], row["version"])
+
+    @timed_operation("add")
     def add_book(self, book):
-        self.books.append(book)
-        self.save_books()
+        """Adds a book. Returns False if its ISBN is already in the catalog."""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO books (isbn, title, author, status, version) VALUES (?, ?, ?, ?, ?)",
+                (book.isbn, book.title, book.author, book.status, book.version))
+        return cursor.rowcount == 1
+
+    def add_books(self, books):
+        """Adds many books in one transaction. Returns the number added."""
+        count = "SELECT COUNT(*) FROM books"
+        with self._lock, self.conn:
+            # total_changes would also count the FTS trigger writes
+            before = self.conn.execute(count).fetchone()[0]
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO books (isbn, title, author, status, version) VALUES (?, ?, ?, ?, ?)",
+                ((b.isbn, b.title, b.author, b.status, b.version) for b in books))
+            return self.conn.execute(count).fetchone()[0] - before
+
+    def iter_books(self):
+        for row in self.conn.execute("SELECT * FROM books ORDER BY rowid"):
+            yield self._book(row)
+
+    def change_status(self, op, isbn, expected_version=None, batched=False):
+        """Issues or returns a book with one compare-and-set UPDATE.
+
+        Batched changes stay in the open transaction until commit().
+        """
+        old_status, new_status = ("available", "issued") if op == "issue" else ("issued", "available")
+        sql = "UPDATE books SET status = ?, version = version + 1 WHERE isbn = ? AND status = ?"
+        params = [new_status, isbn, old_status]
+        if expected_version is not None:
+            sql += " AND version = ?"
+            params.append(expected_version)
+        with self._lock:
+            try:
+                cursor = self.conn.execute(sql, params)
+                if not batched:
+                    self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return cursor.rowcount == 1
+
+    @timed_operation("issue")
+    def issue_book(self, isbn, expected_version=None):
+        return self.change_status("issue", isbn, expected_version)
+
+    @timed_operation("return")
+    def return_book(self, isbn, expected_version=None):
+        return self.change_status("return", isbn, expected_version)
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+
+    def _select(self, query=None, field="title", sort=None, status=None, after=None, limit=-1):
+        """Runs the SELECT behind search and paging; rows carry their rowid as _rowid."""
+        source, where, params = "books b", [], []
+        if query and self.fts and len(query) >= 3:
+            source = "books_fts JOIN books b ON b.rowid = books_fts.rowid"
+            where.append("books_fts MATCH ?")
+            params.append(f"{field} : " + '"' + query.replace('"', '""') + '"')
+        elif query:
+            where.append(f"b.{field} LIKE ? ESCAPE '\\'")
+            params.append("%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if status is not None:
+            where.append("b.status = ?")
+            params.append(status)
+        if sort is None:
+            order = "b.rowid"
+            if after is not None:
+                where.append("b.rowid > ?")
+                params.append(after)
+        else:
+            order = f"b.{sort} COLLATE NOCASE, b.rowid"
+            if after is not None:
+                # Keyset condition: strictly after the last (sort value, rowid) shown
+                where.append(f"(b.{sort} > ? COLLATE NOCASE OR (b.{sort} = ? COLLATE NOCASE AND b.rowid > ?))")
+                params.extend([after[0], after[0], after[1]])
+        sql = f"SELECT b.*, b.rowid AS _rowid FROM {source}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+        return self.conn.execute(sql, params)
+
+    def _search(self, field, query):
+        return [self._book(row) for row in self._select(query, field)]
+
+    def page_books(self, query=None, field="title", sort=None, status=None, after=None, page_size=20):
+        """Returns one page of books and the next cursor, using ORDER BY/LIMIT with a keyset WHERE."""
+        if sort is not None and sort not in SORT_KEYS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        if status is not None and not self.status_counts().get(status):
+            return [], None
+        rows = self._select(query, field, sort, status, after, page_size + 1).fetchall()
+        page = [self._book(row) for row in rows[:page_size]]
+        if len(rows) <= page_size:
+            return page, None
+        last = rows[page_size - 1]
+        return page, (last["_rowid"] if sort is None else (last[sort], last["_rowid"]))
 
     def search_by_title(self, title):
-        return [b for b in self.books if title.lower() in b.title.lower()]
+        return self._search("title", title)
+
+    def search_by_author(self, author):
+        return self._search("author", author)
 
     def search_by_isbn(self, isbn):
-        for b in self.books:
-            if b.isbn == isbn:
-                return b
-        return None
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM books WHERE isbn = ?", (isbn,)).fetchone()
+        return self._book(row) if row else None
+
+    def status_counts(self):
+        rows = self.conn.execute("SELECT status, count FROM status_counts WHERE count > 0")
+        return {status: count for status, count in rows}
+
+    def display_all(self, sort=None, status=None, page_size=20):
+        browse(self, sort=sort, status=status, page_size=page_size)
+
+    def close(self):
+        self.commit()
+        self.conn.close()
 
-    def display_all(self):
-        if not self.books:
-            print("No books in inventory.")
-        for b in self.books:
-            print(b)
 
+def open_inventory(path, journal=False, fast_start=False):
+    """Opens a SQLite catalog for .db/.sqlite paths, otherwise the JSON catalog."""
+    if Path(path).suffix in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteInventory(path)
+    return LibraryInventory(path, journal=journal, fast_start=fast_start)
 
-def main():
-    inventory = LibraryInventory()
+
+def migrate_json_to_sqlite(json_path, db_path):
+    """One-shot copy of a JSON catalog (and any journal tail) into SQLite."""
+    source = LibraryInventory(json_path)
+    target = SQLiteInventory(db_path)
+    count = target.add_books(source.iter_books())
+    target.close()
+    source.close()
+    logger.info("Migrated %d books from %s to %s.", count, json_path, db_path)
+    return count
+
+
+def iter_pages(inventory, page_size=20, **filters):
+    """Yields successive pages from inventory.page_books(), following the cursor."""
+    after = None
+    while True:
+        page, after = inventory.page_books(after=after, page_size=page_size, **filters)
+        if page:
+            yield page
+        if after is None:
+            return
+
+
+def browse(inventory, page_size=20, **filters):
+    """Prints books a page at a time, asking before showing the next page."""
+    counts = inventory.status_counts()
+    total = sum(counts.values())
+    if not total:
+        print("No books in inventory.")
+        return
+    print(f"{total} books: {counts.get('available', 0)} available, {counts.get('issued', 0)} issued.")
+    shown = 0
+    for page in iter_pages(inventory, page_size, **filters):
+        if shown and input("Press Enter for the next page or q to stop: ").strip().lower() == "q":
+            return
+        for book in page:
+            print(book)
+        shown += len(page)
+    if not shown:
+        print("No match found.")
+
+
+BOOK_FIELDS = ["title", "author", "isbn", "status", "version"]
+BOOK_STATUSES = ("available", "issued")
+
+
+def book_from_record(record):
+    """Builds a Book from an import record, raising ValueError if it is invalid."""
+    fields = {}
+    for name in ("title", "author", "isbn"):
+        value = record.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"missing or empty {name}")
+        fields[name] = value.strip()
+    status = record.get("status") or "available"
+    if status not in BOOK_STATUSES:
+        raise ValueError(f"unknown status {status!r}")
+    try:
+        version = int(record.get("version") or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"bad version {record.get('version')!r}")
+    return Book(fields["title"], fields["author"], fields["isbn"], status, version)
+
+
+def read_book_records(path):
+    """Streams raw records from a JSON Lines (.jsonl) or CSV (.csv) file."""
+    with open(path, newline="") as f:
+        if Path(path).suffix.lower() == ".csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def import_books(inventory, path):
+    """Validates, de-duplicates by ISBN and bulk-inserts the books in path.
+
+    Records are streamed from the file and inserted as one batch with a
+    single persistence write. Returns counts plus records per second.
+    """
+    start = time.perf_counter()
+    stats = {"read": 0, "imported": 0, "invalid": 0, "duplicates": 0}
+    seen = set()
+
+    def valid_books():
+        for number, record in enumerate(read_book_records(path), 1):
+            stats["read"] += 1
+            try:
+                book = book_from_record(record)
+            except (ValueError, AttributeError) as e:
+                stats["invalid"] += 1
+                logger.error("Skipping record %d in %s: %s", number, path, e)
+                continue
+            if book.isbn in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(book.isbn)
+            yield book
+
+    stats["imported"] = inventory.add_books(valid_books())
+    # Unique records that were not inserted already existed in the catalog
+    stats["duplicates"] += len(seen) - stats["imported"]
+    stats["seconds"] = time.perf_counter() - start
+    stats["records_per_second"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+    logger.info("Imported %d of %d records from %s.", stats["imported"], stats["read"], path)
+    return stats
+
+
+def export_books(inventory, path):
+    """Streams the catalog to a JSON Lines or CSV file, one book at a time."""
+    start = time.perf_counter()
+    count = 0
+    with open(path, "w", newline="") as f:
+        if Path(path).suffix.lower() == ".csv":
+            writer = csv.DictWriter(f, fieldnames=BOOK_FIELDS)
+            writer.writeheader()
+            for book in inventory.iter_books():
+                writer.writerow(book.to_dict())
+                count += 1
+        else:
+            for book in inventory.iter_books():
+                f.write(json.dumps(book.to_dict(), separators=(',', ':')) + "\n")
+                count += 1
+    seconds = time.perf_counter() - start
+    logger.info("Exported %d books to %s.", count, path)
+    return {"exported": count, "seconds": seconds,
+            "records_per_second": count / seconds if seconds else 0.0}
+
+
+class CheckoutService:
+    """Issue/return front end that group-commits concurrent requests.
+
+    Callers on any thread submit changes to a queue. A single committer
+    thread takes everything queued so far (up to `batch_size`, optionally
+    waiting `max_delay` seconds for more) and applies it. It makes the whole
+    batch durable with one commit() and only then reports each result.
+    Requests that arrive during a commit form the next batch, so hundreds of
+    checkouts a second share one journal fsync, snapshot or SQLite
+    transaction. Each change_status() call's latency goes to OP_LATENCY.
+    """
+
+    def __init__(self, inventory, batch_size=64, max_delay=0.0):
+        self.inventory = inventory
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, op, isbn, expected_version=None):
+        future = Future()
+        self._queue.put((op, isbn, expected_version, future))
+        return future
+
+    def change_status(self, op, isbn, expected_version=None):
+        # Logged on the caller's thread so the committer never formats records
+        start = time.perf_counter()
+        ok = self.submit(op, isbn, expected_version).result()
+        log_operation(op, isbn, ok, time.perf_counter() - start)
+        return ok
+
+    def issue(self, isbn, expected_version=None):
+        return self.change_status("issue", isbn, expected_version)
+
+    def return_book(self, isbn, expected_version=None):
+        return self.change_status("return", isbn, expected_version)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                try:
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Finish this batch, then stop
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        results = []
+        for op, isbn, expected_version, future in batch:
+            try:
+                results.append((future, self.inventory.change_status(op, isbn, expected_version, batched=True), None))
+            except Exception as e:
+                results.append((future, None, e))
+        try:
+            self.inventory.commit()
+        except Exception as e:
+            logger.error("Batch commit failed: %s", e)
+            for future, _, _ in results:
+                future.set_exception(e)
+            return
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+def _hammer(change_status, isbns, ops, seed):
+    """Random issues/returns on a few ISBNs; returns successes per (op, isbn)."""
+    rng = random.Random(seed)
+    successes = defaultdict(int)
+    for _ in range(ops):
+        op = rng.choice(("issue", "return"))
+        isbn = rng.choice(isbns)
+        if change_status(op, isbn):
+            successes[(op, isbn)] += 1
+    return dict(successes)
+
+
+def _stress_process(args):
+    db_path, isbns, ops, seed = args
+    inventory = SQLiteInventory(db_path)
+    try:
+        return _hammer(inventory.change_status, isbns, ops, seed)
+    finally:
+        inventory.close()
+
+
+def stress_test(backend="json", workers=8, ops=500, n_isbns=4, processes=False, batched=True):
+    """Hammers the same few ISBNs from many workers and checks the invariants.
+
+    Threads share one inventory (through a CheckoutService when batched);
+    processes each open the SQLite database themselves. Afterwards the
+    catalog is reopened from disk and, for every ISBN, successful issues
+    minus returns must be 0 or 1 and match the final status, and the
+    version must equal the number of successful changes.
+    """
+    if processes and backend != "sqlite":
+        raise ValueError("Multi-process stress tests need the sqlite backend.")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / ("catalog.db" if backend == "sqlite" else "catalog.json")
+        inventory = open_inventory(path, journal=True)
+        isbns = [f"stress-{i}" for i in range(n_isbns)]
+        for isbn in isbns:
+            inventory.add_book(Book(f"Stress Book {isbn}", "Stress Author", isbn))
+
+        start = time.perf_counter()
+        if processes:
+            inventory.close()
+            with multiprocessing.Pool(workers) as pool:
+                tallies = pool.map(_stress_process, [(path, isbns, ops, seed) for seed in range(workers)])
+        else:
+            service = CheckoutService(inventory) if batched else None
+            change = service.change_status if service else inventory.change_status
+            tallies = [None] * workers
+
+            def run(i):
+                tallies[i] = _hammer(change, isbns, ops, i)
+
+            threads = [threading.Thread(target=run, args=(i,)) for i in range(workers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            if service:
+                service.close()
+            inventory.close()
+        elapsed = time.perf_counter() - start
+
+        totals = defaultdict(int)
+        for tally in tallies:
+            for key, count in tally.items():
+                totals[key] += count
+
+        reopened = open_inventory(path)
+        try:
+            for isbn in isbns:
+                issues, returns = totals[("issue", isbn)], totals[("return", isbn)]
+                book = reopened.search_by_isbn(isbn)
+                net = issues - returns
+                if net not in (0, 1):
+                    raise AssertionError(f"{isbn}: {issues} issues vs {returns} returns")
+                if (book.status == "issued") != (net == 1):
+                    raise AssertionError(f"{isbn}: status {book.status} after {issues} issues, {returns} returns")
+                if book.version != issues + returns:
+                    raise AssertionError(f"{isbn}: version {book.version}, expected {issues + returns}")
+        finally:
+            reopened.close()
+
+    total_ops = workers * ops
+    mode = "processes" if processes else ("threads, batched" if batched else "threads")
+    print(f"Stress test passed: {backend} backend, {workers} {mode}, {total_ops} ops "
+          f"in {elapsed:.2f}s ({total_ops / elapsed:.0f} ops/s)")
+    if not processes and batched:
+        print("Checkout latency:")
+        print(OP_LATENCY.report())
+    return True
+
+
+def _ask_listing_options():
+    sort = input("Sort by title/author/status (Enter for catalog order): ").strip().lower() or None
+    if sort not in SORT_KEYS:
+        sort = None
+    status = input("Show only available/issued (Enter for all): ").strip().lower() or None
+    if status not in ("available", "issued"):
+        status = None
+    return {"sort": sort, "status": status}
+
+
+def benchmark_startup(n_books=1_000_000, lookups=1000):
+    """Times opening an n_books JSON catalog with a full load and with fast start.
+
+    Time-to-menu covers the constructor plus the status counts and first page
+    that the menu shows.
+    """
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "catalog.json"
+        with open(path, "w") as f:
+            json.dump([{"title": f"Book {i}", "author": f"Author {i % 5000}", "isbn": f"978{i:010d}",
+                        "status": "issued" if i % 4 == 0 else "available", "version": 0}
+                       for i in range(n_books)], f)
+        isbns = [f"978{rng.randrange(n_books):010d}" for _ in range(lookups)]
+
+        def time_to_menu(**options):
+            start = time.perf_counter()
+            inventory = LibraryInventory(path, journal=True, **options)
+            inventory.status_counts()
+            inventory.page_books()
+            elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            for isbn in isbns:
+                inventory.search_by_isbn(isbn)
+            lookup = (time.perf_counter() - start) / lookups
+            inventory.close()
+            return elapsed, lookup
+
+        full, full_lookup = time_to_menu()
+        start = time.perf_counter()
+        # The first fast start finds no snapshot, loads fully and writes one
+        LibraryInventory(path, journal=True, fast_start=True).close()
+        build = time.perf_counter() - start
+        fast, fast_lookup = time_to_menu(fast_start=True)
+
+    print(f"Startup with {n_books} books:")
+    print(f"  full load       {full * 1000:10.1f} ms to menu, {full_lookup * 1e6:7.1f} us per ISBN lookup")
+    print(f"  snapshot build  {build * 1000:10.1f} ms (once, after a stale or missing snapshot)")
+    print(f"  fast start      {fast * 1000:10.1f} ms to menu, {fast_lookup * 1e6:7.1f} us per ISBN lookup")
+    return {"full": full, "snapshot_build": build, "fast": fast}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Library Inventory Manager")
+    parser.add_argument("--catalog", default="catalog.json",
+                        help="catalog file; a .db/.sqlite path uses the SQLite backend")
+    parser.add_argument("--journal", action="store_true",
+                        help="append each change to a journal instead of rewriting the catalog")
+    parser.add_argument("--migrate", nargs=2, metavar=("JSON", "DB"),
+                        help="copy a JSON catalog into a SQLite database and exit")
+    parser.add_argument("--import", dest="import_path", metavar="FILE",
+                        help="bulk-import books from a .jsonl or .csv file and exit")
+    parser.add_argument("--export", dest="export_path", metavar="FILE",
+                        help="export the catalog to a .jsonl or .csv file and exit")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="open a JSON catalog from its binary snapshot (implies --journal)")
+    parser.add_argument("--bench-startup", type=int, metavar="N",
+                        help="time full and fast startup for an N-book catalog and exit")
+    parser.add_argument("--stress", choices=["json", "sqlite"],
+                        help="run the concurrent checkout stress test on this backend and exit")
+    parser.add_argument("--stress-workers", type=int, default=8)
+    parser.add_argument("--stress-ops", type=int, default=500, help="operations per worker")
+    parser.add_argument("--stress-processes", action="store_true",
+                        help="use worker processes instead of threads (sqlite only)")
+    parser.add_argument("--log-file", default="library.log")
+    parser.add_argument("--log-max-bytes", type=int, default=1_000_000,
+                        help="rotate the log file once it reaches this size")
+    args = parser.parse_args(argv)
+
+    listener = setup_logging(args.log_file, args.log_max_bytes)
+    try:
+        run(args)
+    finally:
+        listener.stop()
+
+
+def run(args):
+    if args.bench_startup:
+        benchmark_startup(args.bench_startup)
+        return
+
+    if args.stress:
+        stress_test(args.stress, args.stress_workers, args.stress_ops, processes=args.stress_processes)
+        return
+
+    if args.migrate:
+        count = migrate_json_to_sqlite(*args.migrate)
+        print(f"Migrated {count} books to {args.migrate[1]}.")
+        return
+
+    inventory = open_inventory(args.catalog, journal=args.journal or args.fast_start,
+                               fast_start=args.fast_start)
+
+    if args.import_path or args.export_path:
+        if args.import_path:
+            stats = import_books(inventory, args.import_path)
+            print(f"Imported {stats['imported']} of {stats['read']} records "
+                  f"({stats['invalid']} invalid, {stats['duplicates']} duplicates) "
+                  f"at {stats['records_per_second']:.0f} records/s.")
+        if args.export_path:
+            stats = export_books(inventory, args.export_path)
+            print(f"Exported {stats['exported']} books at {stats['records_per_second']:.0f} records/s.")
+        inventory.close()
+        return
 
     while True:
         print("\n---- Library Inventory Manager ----")
@@ -104,40 +1461,37 @@ def main():
                 title = input("Enter title: ")
                 author = input("Enter author: ")
                 isbn = input("Enter ISBN: ")
-                inventory.add_book(Book(title, author, isbn))
-                print("Book added.")
+                if inventory.add_book(Book(title, author, isbn)):
+                    print("Book added.")
+                else:
+                    print("A book with that ISBN already exists.")
 
             elif choice == '2':
                 isbn = input("Enter ISBN to issue: ")
-                book = inventory.search_by_isbn(isbn)
-                if book and book.issue():
-                    inventory.save_books()
+                if inventory.issue_book(isbn):
                     print("Book issued.")
                 else:
                     print("Book unavailable or not found.")
 
             elif choice == '3':
                 isbn = input("Enter ISBN to return: ")
-                book = inventory.search_by_isbn(isbn)
-                if book and book.return_book():
-                    inventory.save_books()
+                if inventory.return_book(isbn):
                     print("Book returned.")
                 else:
                     print("Book not found or already available.")
 
             elif choice == '4':
-                inventory.display_all()
+                inventory.display_all(**_ask_listing_options())
 
             elif choice == '5':
                 title = input("Enter title to search: ")
-                results = inventory.search_by_title(title)
-                if results:
-                    for b in results:4
-                    print(b)
-                else:
-                    print("No match found.")
+                browse(inventory, query=title, field="title", **_ask_listing_options())
 
             elif choice == '6':
+                inventory.close()
+                if OP_LATENCY.count("issue") or OP_LATENCY.count("return"):
+                    print("Operation latency this session:")
+                    print(OP_LATENCY.report())
                 print("Exiting...")
                 break
 
@@ -145,7 +1499,7 @@ def main():
                 print("Invalid choice. Try again.")
 
         except Exception as e:
-            logging.error(f"Error in operation: {e}")
+            logger.error("Error in operation: %s", e)
             print("An error occurred.")
 
 
@@ -1,168 +1,191 @@
 # Import necessary libraries
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+# pandas and matplotlib are imported where they are used, so a rerun whose
+# outputs are all up to date finishes without loading them
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from weather_cache import ArtifactGraph
+
+STATS_METRICS = ['MeanTemp', 'Rainfall', 'Humidity3pm']
+ALL_STATS = ['mean', 'min', 'max', 'std']
+STATS_SPEC = {metric: ALL_STATS for metric in STATS_METRICS}
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
 # Task 1: Data Acquisition and Loading
+def load_weather(path='weather.csv', start_date='2008-12-01'):
+    """Loads a station CSV, adding daily dates from start_date if it has no Date column."""
+    import pandas as pd
+    df = pd.read_csv(path)
 
-# Load the CSV 
-df = pd.read_csv('weather.csv')  
+    if 'Date' not in df.columns:
+        df['Date'] = pd.date_range(start=start_date, periods=len(df), freq='D')
 
-if 'Date' not in df.columns:
-    start_date = '2008-12-01'  
-    df['Date'] = pd.date_range(start=start_date, periods=len(df), freq='D')
+    # Inspect the structure
+    print("Head of the DataFrame:")
+    print(df.head())
+    print("\nInfo of the DataFrame:")
+    print(df.info())
+    print("\nDescribe of the DataFrame:")
+    print(df.describe())
+    return df
 
-# Inspect the structure
-print("Head of the DataFrame:")
-print(df.head())
-print("\nInfo of the DataFrame:")
-print(df.info())
-print("\nDescribe of the DataFrame:")
-print(df.describe())
 
 # Task 2: Data Cleaning and Processing
+def clean_weather(df):
+    key_columns = ['MinTemp', 'MaxTemp', 'Rainfall', 'Humidity3pm']
+    df_clean = df.dropna(subset=key_columns).copy()
 
-key_columns = ['MinTemp', 'MaxTemp', 'Rainfall', 'Humidity3pm']
-df_clean = df.dropna(subset=key_columns).copy()
-
-# Filter for relevant columns (using available ones: MinTemp, MaxTemp, Rainfall, Humidity3pm)
-df_filtered = df_clean[['Date', 'MinTemp', 'MaxTemp', 'Rainfall', 'Humidity3pm']].copy()
+    # Filter for relevant columns (using available ones: MinTemp, MaxTemp, Rainfall, Humidity3pm)
+    df_filtered = df_clean[['Date', 'MinTemp', 'MaxTemp', 'Rainfall', 'Humidity3pm']].copy()
 
-# Create a 'MeanTemp' column as average of MinTemp and MaxTemp for analysis
-df_filtered['MeanTemp'] = (df_filtered['MinTemp'] + df_filtered['MaxTemp']) / 2
+    # Create a 'MeanTemp' column as average of MinTemp and MaxTemp for analysis
+    df_filtered['MeanTemp'] = (df_filtered['MinTemp'] + df_filtered['MaxTemp']) / 2
 
-# Set Date as index for time-series operations
-df_filtered.set_index('Date', inplace=True)
+    # Set Date as index for time-series operations
+    df_filtered.set_index('Date', inplace=True)
+    return df_filtered
 
-print("\nCleaned and filtered DataFrame head:")
-print(df_filtered.head())
 
 # Task 3: Statistical Analysis with NumPy
-daily_stats = {
-    'MeanTemp': {
-        'mean': np.mean(df_filtered['MeanTemp']),
-        'min': np.min(df_filtered['MeanTemp']),
-        'max': np.max(df_filtered['MeanTemp']),
-        'std': np.std(df_filtered['MeanTemp'])
-    },
-    'Rainfall': {
-        'mean': np.mean(df_filtered['Rainfall']),
-        'min': np.min(df_filtered['Rainfall']),
-        'max': np.max(df_filtered['Rainfall']),
-        'std': np.std(df_filtered['Rainfall'])
-    },
-    'Humidity3pm': {
-        'mean': np.mean(df_filtered['Humidity3pm']),
-        'min': np.min(df_filtered['Humidity3pm']),
-        'max': np.max(df_filtered['Humidity3pm']),
-        'std': np.std(df_filtered['Humidity3pm'])
-    }
-}
+def print_statistics(partials):
+    """Derives and prints the overall, monthly and yearly tables from the per-day partials."""
+    from weather_stats import overall_stats, summarize
+    daily_stats = overall_stats(partials, STATS_SPEC)
 
-print("\nDaily Statistics:")
-for var, stats in daily_stats.items():
-    print(f"{var}: Mean={stats['mean']:.2f}, Min={stats['min']:.2f}, Max={stats['max']:.2f}, Std={stats['std']:.2f}")
+    print("\nDaily Statistics:")
+    for var, stats in daily_stats.items():
+        print(f"{var}: Mean={stats['mean']:.2f}, Min={stats['min']:.2f}, Max={stats['max']:.2f}, Std={stats['std']:.2f}")
 
-# Monthly statistics using resample
-monthly_stats = df_filtered.resample('M').agg({
-    'MeanTemp': ['mean', 'min', 'max', 'std'],
-    'Rainfall': ['mean', 'min', 'max', 'std'],
-    'Humidity3pm': ['mean', 'min', 'max', 'std']
-})
+    # Monthly statistics, one row per calendar month
+    monthly_stats = summarize(partials, 'month', STATS_SPEC)
 
-print("\nMonthly Statistics (first 5 months):")
-print(monthly_stats.head())
+    print("\nMonthly Statistics (first 5 months):")
+    print(monthly_stats.head())
 
-# Yearly statistics
-yearly_stats = df_filtered.resample('Y').agg({
-    'MeanTemp': ['mean', 'min', 'max', 'std'],
-    'Rainfall': ['mean', 'min', 'max', 'std'],
-    'Humidity3pm': ['mean', 'min', 'max', 'std']
-})
+    # Yearly statistics
+    yearly_stats = summarize(partials, 'year', STATS_SPEC)
+
+    print("\nYearly Statistics:")
+    print(yearly_stats)
+    return daily_stats
 
-print("\nYearly Statistics:")
-print(yearly_stats)
 
 # Task 4: Visualization with Matplotlib
-# Line chart for daily temperature trends (using MeanTemp)
-plt.figure(figsize=(12, 6))
-plt.plot(df_filtered.index, df_filtered['MeanTemp'], label='Daily Mean Temperature')
-plt.title('Daily Temperature Trends')
-plt.xlabel('Date')
-plt.ylabel('Temperature (°C)')
-plt.legend()
-plt.savefig('daily_temperature_trends.png')
-plt.show()
-
-# Bar chart for monthly rainfall totals
-monthly_rainfall = df_filtered['Rainfall'].resample('M').sum()
-plt.figure(figsize=(12, 6))
-monthly_rainfall.plot(kind='bar', color='blue')
-plt.title('Monthly Rainfall Totals')
-plt.xlabel('Month')
-plt.ylabel('Rainfall (mm)')
-plt.xticks(rotation=45)
-plt.savefig('monthly_rainfall_totals.png')
-plt.show()
-
-# Scatter plot for humidity vs. temperature
-plt.figure(figsize=(8, 6))
-plt.scatter(df_filtered['Humidity3pm'], df_filtered['MeanTemp'], alpha=0.5, color='green')
-plt.title('Humidity vs. Temperature')
-plt.xlabel('Humidity at 3pm (%)')
-plt.ylabel('Mean Temperature (°C)')
-plt.savefig('humidity_vs_temperature.png')
-plt.show()
-
-# Combine at least two plots in a single figure (e.g., line and bar)
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
-ax1.plot(df_filtered.index, df_filtered['MeanTemp'], color='red')
-ax1.set_title('Daily Temperature Trends')
-ax1.set_ylabel('Temperature (°C)')
-monthly_rainfall.plot(kind='bar', ax=ax2, color='blue')
-ax2.set_title('Monthly Rainfall Totals')
-ax2.set_ylabel('Rainfall (mm)')
-ax2.tick_params(axis='x', rotation=45)
-plt.tight_layout()
-plt.savefig('combined_plots.png')
-plt.show()
+# Figures are built with the object API and saved through the Agg canvas,
+# so rendering never needs a display and can run in worker processes
+def _new_figure(figsize):
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+
+def plot_daily_temperature(df_filtered, monthly_rainfall, path):
+    # Line chart for daily temperature trends (using MeanTemp)
+    fig = _new_figure((12, 6))
+    ax = fig.add_subplot()
+    ax.plot(df_filtered.index, df_filtered['MeanTemp'], label='Daily Mean Temperature')
+    ax.set_title('Daily Temperature Trends')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Temperature (°C)')
+    ax.legend()
+    fig.savefig(path)
+
+
+def plot_monthly_rainfall(df_filtered, monthly_rainfall, path):
+    # Bar chart for monthly rainfall totals
+    fig = _new_figure((12, 6))
+    ax = fig.add_subplot()
+    monthly_rainfall.plot(kind='bar', ax=ax, color='blue')
+    ax.set_title('Monthly Rainfall Totals')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Rainfall (mm)')
+    ax.tick_params(axis='x', rotation=45)
+    fig.savefig(path)
+
+
+def plot_humidity_vs_temperature(df_filtered, monthly_rainfall, path):
+    # Scatter plot for humidity vs. temperature
+    fig = _new_figure((8, 6))
+    ax = fig.add_subplot()
+    ax.scatter(df_filtered['Humidity3pm'], df_filtered['MeanTemp'], alpha=0.5, color='green')
+    ax.set_title('Humidity vs. Temperature')
+    ax.set_xlabel('Humidity at 3pm (%)')
+    ax.set_ylabel('Mean Temperature (°C)')
+    fig.savefig(path)
+
+
+def plot_combined(df_filtered, monthly_rainfall, path):
+    # Combine at least two plots in a single figure (e.g., line and bar)
+    fig = _new_figure((12, 10))
+    ax1, ax2 = fig.subplots(2, 1)
+    ax1.plot(df_filtered.index, df_filtered['MeanTemp'], color='red')
+    ax1.set_title('Daily Temperature Trends')
+    ax1.set_ylabel('Temperature (°C)')
+    monthly_rainfall.plot(kind='bar', ax=ax2, color='blue')
+    ax2.set_title('Monthly Rainfall Totals')
+    ax2.set_ylabel('Rainfall (mm)')
+    ax2.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+# Artifact name -> (file name, renderer)
+PLOTS = {
+    'daily_plot': ('daily_temperature_trends.png', plot_daily_temperature),
+    'rainfall_plot': ('monthly_rainfall_totals.png', plot_monthly_rainfall),
+    'scatter_plot': ('humidity_vs_temperature.png', plot_humidity_vs_temperature),
+    'combined_plot': ('combined_plots.png', plot_combined),
+}
 
-# Task 5: Grouping and Aggregation
-# Group by month and calculate aggregate statistics
-monthly_grouped = df_filtered.groupby(df_filtered.index.month).agg({
-    'MeanTemp': ['mean', 'min', 'max', 'std'],
-    'Rainfall': ['sum', 'mean'],  # Sum for total rainfall, mean for average
-    'Humidity3pm': ['mean', 'min', 'max']
-})
-
-print("\nGrouped by Month (Aggregate Statistics):")
-print(monthly_grouped)
-
-# Group by season 
-def get_season(month):
-    if month in [12, 1, 2]:
-        return 'Winter'
-    elif month in [3, 4, 5]:
-        return 'Spring'
-    elif month in [6, 7, 8]:
-        return 'Summer'
-    else:
-        return 'Autumn'
 
-df_filtered['Season'] = df_filtered.index.month.map(get_season)
-seasonal_grouped = df_filtered.groupby('Season').agg({
-    'MeanTemp': ['mean', 'min', 'max'],
-    'Rainfall': ['sum', 'mean'],
-    'Humidity3pm': ['mean', 'min', 'max']
-})
+def render_plots(jobs, df_filtered, monthly_rainfall, workers=None):
+    """
+    Renders [(plot name, path)] from PLOTS, in parallel worker processes
+    when there is more than one plot and more than one core to use.
+    """
+    if not jobs:
+        return
+    plot_data = df_filtered[['MeanTemp', 'Humidity3pm']]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers == 1:
+        for name, path in jobs:
+            PLOTS[name][1](plot_data, monthly_rainfall, path)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(PLOTS[name][1], plot_data, monthly_rainfall, path) for name, path in jobs]
+        for future in futures:
+            future.result()
 
-print("\nGrouped by Season (Aggregate Statistics):")
-print(seasonal_grouped)
 
-# Task 6: Export and Storytelling
-df_filtered.to_csv('cleaned_weather_data.csv')
+# Task 5: Grouping and Aggregation
+def print_groupings(df_filtered, partials):
+    from weather_stats import summarize, season_of
+    # Group by month and calculate aggregate statistics
+    monthly_grouped = summarize(partials, 'month_of_year', {
+        'MeanTemp': ['mean', 'min', 'max', 'std'],
+        'Rainfall': ['sum', 'mean'],  # Sum for total rainfall, mean for average
+        'Humidity3pm': ['mean', 'min', 'max']
+    })
+
+    print("\nGrouped by Month (Aggregate Statistics):")
+    print(monthly_grouped)
+
+    # Group by season (seasons come from a month -> season lookup table)
+    df_filtered['Season'] = season_of(df_filtered.index.month)
+    seasonal_grouped = summarize(partials, 'season', {
+        'MeanTemp': ['mean', 'min', 'max'],
+        'Rainfall': ['sum', 'mean'],
+        'Humidity3pm': ['mean', 'min', 'max']
+    })
+
+    print("\nGrouped by Season (Aggregate Statistics):")
+    print(seasonal_grouped)
 
-report = """
+
+# Task 6: Export and Storytelling
+REPORT = """
 # Weather Data Analysis Report
 
 ## Overview
@@ -201,7 +224,123 @@ This report analyzes weather data from your provided CSV file, focusing on tempe
 - Plots: `daily_temperature_trends.png`, `monthly_rainfall_totals.png`, `humidity_vs_temperature.png`, `combined_plots.png`
 """
 
-with open('weather_analysis_report.md', 'w') as f:
-    f.write(report)
 
-print("Analysis complete. Files exported: cleaned_weather_data.csv, plots as PNG, and report as weather_analysis_report.md")
+def build_artifacts(input_path, output_dir='.', start_date='2008-12-01', chunked=False, keep_wind=False):
+    """
+    The task graph behind run_pipeline(): the station file and the analysis
+    code are the sources; the cleaned data depends on both and every plot
+    depends on the cleaned data, while the report depends only on the code.
+    """
+    graph = ArtifactGraph(output_dir)
+    graph.add_source('input', input_path)
+    for module in ('weather', 'weather_stats', 'weather_loader'):
+        graph.add_source(module, os.path.join(CODE_DIR, module + '.py'))
+
+    cleaned_file = 'cleaned_weather_data.feather' if chunked else 'cleaned_weather_data.csv'
+    graph.add('cleaned', cleaned_file, ['input', 'weather', 'weather_stats', 'weather_loader'],
+              {'start_date': start_date, 'chunked': chunked, 'keep_wind': keep_wind})
+    for name, (filename, _) in PLOTS.items():
+        graph.add(name, filename, ['cleaned'])
+    graph.add('report', 'weather_analysis_report.md', ['weather'])
+    return graph
+
+
+def run_pipeline(input_path='weather.csv', output_dir='.', start_date='2008-12-01', chunked=False,
+                 chunksize=100_000, keep_wind=False, plot_workers=None, force=False):
+    """
+    Runs the whole analysis for one station file and writes every output to output_dir.
+    Outputs whose inputs and parameters are unchanged since the last run are kept; if all
+    of them are, the analysis is skipped. Returns a one-row summary of the station.
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    graph = build_artifacts(input_path, output_dir, start_date, chunked, keep_wind)
+    stale = graph.stale()
+    summary = graph.manifest.get('summary')
+    if not force and not stale and summary and graph.manifest.get('summary_key') == graph.key('cleaned'):
+        print(f"All outputs in {output_dir} are up to date with {input_path}")
+        summary['seconds'] = time.perf_counter() - start
+        return summary
+    if force:
+        stale = graph.names()
+
+    from weather_stats import compute_partials, summarize
+    cleaned_file = graph.path('cleaned')
+    if chunked and 'cleaned' in stale:
+        # Tasks 1 and 2 chunk by chunk; the statistics partials are merged along the way
+        from weather_loader import write_clean_columnar, read_clean_columnar
+        rows, partials = write_clean_columnar(input_path, cleaned_file, chunksize, start_date, wind=keep_wind)
+        df_filtered = read_clean_columnar(cleaned_file)
+        print(f"Cleaned {rows} rows into {cleaned_file}")
+    elif chunked:
+        from weather_loader import read_clean_columnar
+        df_filtered = read_clean_columnar(cleaned_file)
+        partials = compute_partials(df_filtered, STATS_METRICS)
+    else:
+        df_filtered = clean_weather(load_weather(input_path, start_date))
+        # One pass over the data builds per-day partial moments; every table below is derived from them
+        partials = compute_partials(df_filtered, STATS_METRICS)
+
+    print("\nCleaned and filtered DataFrame head:")
+    print(df_filtered.head())
+
+    daily_stats = print_statistics(partials)
+
+    # Computed once for both the standalone and the combined rainfall figures
+    monthly_rainfall = summarize(partials, 'month', {'Rainfall': ['sum']})[('Rainfall', 'sum')]
+    monthly_rainfall.name = 'Rainfall'
+    render_plots([(name, graph.path(name)) for name in PLOTS if name in stale],
+                 df_filtered, monthly_rainfall, plot_workers)
+
+    print_groupings(df_filtered, partials)
+
+    if not chunked and 'cleaned' in stale:
+        df_filtered.to_csv(cleaned_file)
+    if 'report' in stale:
+        with open(graph.path('report'), 'w') as f:
+            f.write(REPORT)
+    for name in stale:
+        graph.mark_built(name)
+
+    print(f"Analysis complete. Files exported: {os.path.basename(cleaned_file)}, plots as PNG, "
+          f"and report as weather_analysis_report.md")
+    kept = [os.path.basename(graph.path(name)) for name in graph.names() if name not in stale]
+    if kept:
+        print(f"Up to date, not rewritten: {', '.join(kept)}")
+
+    summary = {
+        'station': os.path.splitext(os.path.basename(input_path))[0],
+        'rows': len(df_filtered),
+        'start': df_filtered.index.min(),
+        'end': df_filtered.index.max(),
+    }
+    for metric, stats in daily_stats.items():
+        for stat, value in stats.items():
+            summary[f'{metric}_{stat}'] = value
+    summary['Rainfall_total'] = float(monthly_rainfall.sum())
+    graph.save(summary=summary, summary_key=graph.key('cleaned'))
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Weather data analysis")
+    parser.add_argument('--input', default='weather.csv', help="station CSV to analyse")
+    parser.add_argument('--output-dir', default='.', help="directory for the plots, cleaned data and report")
+    parser.add_argument('--start-date', default='2008-12-01', help="first date for files without a Date column")
+    parser.add_argument('--chunked', action='store_true',
+                        help="stream the CSV in chunks with only the needed columns (float32) and "
+                             "write cleaned_weather_data.feather instead of the CSV")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="rows per chunk with --chunked")
+    parser.add_argument('--keep-wind', action='store_true',
+                        help="with --chunked, also keep the wind directions as categorical columns")
+    parser.add_argument('--plot-workers', type=int, default=None,
+                        help="processes for rendering stale plots (default: all cores)")
+    parser.add_argument('--force', action='store_true', help="rebuild every output even if it is up to date")
+    args = parser.parse_args(argv)
+    run_pipeline(args.input, args.output_dir, args.start_date, args.chunked, args.chunksize,
+                 args.keep_wind, args.plot_workers, args.force)
+
+
+if __name__ == "__main__":
+    main()
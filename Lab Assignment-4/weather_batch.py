@@ -0,0 +1,97 @@
+"""
+Batch runner for weather.py over a directory of station CSVs.
+
+Every station runs weather.run_pipeline() in a worker process of a pool
+sized to the available cores, so pandas and matplotlib are imported once
+per worker instead of once per station. Stations whose outputs are up to
+date are skipped by weather.py's artifact cache. Each station writes its plots,
+cleaned data, report and console output into <output-dir>/<station>/, and
+the per-station summaries are combined into station_summary.csv.
+"""
+import os
+import glob
+import time
+import argparse
+import contextlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from weather import run_pipeline
+
+
+def run_station(path, output_dir, start_date='2008-12-01', chunked=False, chunksize=100_000):
+    """
+    Runs the pipeline for one station, capturing its console output in
+    analysis_output.txt. Returns the station summary, with an error column
+    instead of statistics if the station failed.
+    """
+    station = os.path.splitext(os.path.basename(path))[0]
+    station_dir = os.path.join(output_dir, station)
+    os.makedirs(station_dir, exist_ok=True)
+    start = time.perf_counter()
+    with open(os.path.join(station_dir, 'analysis_output.txt'), 'w') as log, \
+            contextlib.redirect_stdout(log):
+        try:
+            summary = run_pipeline(path, station_dir, start_date, chunked, chunksize, plot_workers=1)
+        except Exception as e:
+            traceback.print_exc(file=log)
+            summary = {'station': station, 'error': f"{type(e).__name__}: {e}"}
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def run_batch(input_dir, output_dir, workers=None, pattern='*.csv', start_date='2008-12-01',
+              chunked=False, chunksize=100_000):
+    """Analyses every station file in input_dir in parallel and returns the combined summary table."""
+    paths = sorted(glob.glob(os.path.join(input_dir, pattern)))
+    if not paths:
+        raise ValueError(f"No files matching {pattern} in {input_dir}")
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Analysing {len(paths)} stations with {workers} workers")
+
+    start = time.perf_counter()
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_station, path, output_dir, start_date, chunked, chunksize)
+                   for path in paths]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            status = f"FAILED ({summary['error']})" if 'error' in summary else f"{summary['rows']} rows"
+            print(f"  {summary['station']}: {status} in {summary['seconds']:.2f}s")
+    elapsed = time.perf_counter() - start
+
+    table = pd.DataFrame(summaries).set_index('station').sort_index()
+    trailing = [c for c in ('seconds', 'error') if c in table.columns]
+    table = table[[c for c in table.columns if c not in trailing] + trailing]
+    table.to_csv(os.path.join(output_dir, 'station_summary.csv'))
+    busy = table['seconds'].sum()
+    print(f"Done in {elapsed:.2f}s ({busy:.2f}s of station time, {busy / elapsed:.1f}x parallel speed-up)")
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the weather analysis over a directory of stations")
+    parser.add_argument('input_dir', help="directory of station CSV files")
+    parser.add_argument('--output-dir', default='station_reports', help="one subdirectory per station goes here")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--pattern', default='*.csv', help="glob for station files inside input_dir")
+    parser.add_argument('--start-date', default='2008-12-01', help="first date for files without a Date column")
+    parser.add_argument('--chunked', action='store_true', help="use the chunked columnar loader per station")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="rows per chunk with --chunked")
+    args = parser.parse_args(argv)
+
+    try:
+        table = run_batch(args.input_dir, args.output_dir, args.workers, args.pattern,
+                          args.start_date, args.chunked, args.chunksize)
+    except ValueError as e:
+        parser.exit(1, f"Error: {e}\n")
+    print("\nCross-station summary:")
+    print(table)
+
+
+if __name__ == "__main__":
+    main()
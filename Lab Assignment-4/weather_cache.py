@@ -0,0 +1,95 @@
+"""
+Dependency-aware artifact cache for weather.py.
+
+An ArtifactGraph holds source files (the station CSV and the analysis
+code) and artifacts (output files), each artifact with the sources or
+artifacts it depends on and the parameters that shape it. An artifact's
+key hashes its parameters with the keys of its dependencies, so a change
+to the input or to a parameter marks exactly the outputs downstream of it
+as stale. Keys of built artifacts are kept in a JSON manifest next to the
+outputs. Source digests are reused while a file's size and mtime are
+unchanged, so a rerun on unchanged data does not even re-read the input.
+
+Only the standard library is used here: weather.py decides what is stale
+before importing pandas or matplotlib.
+"""
+import os
+import json
+import hashlib
+
+MANIFEST_NAME = '.weather_cache.json'
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _hash(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ArtifactGraph:
+    """Source files and output artifacts with content-hash keys and a persistent manifest."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.manifest.setdefault('sources', {})
+        self.manifest.setdefault('artifacts', {})
+        self._keys = {}
+        self._artifacts = {}
+
+    def add_source(self, name, path):
+        """Registers an input file; its key is its content hash."""
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        known = self.manifest['sources'].get(name)
+        if known and known['path'] == path and known['stamp'] == stamp:
+            digest = known['digest']
+        else:
+            digest = file_digest(path)
+            self.manifest['sources'][name] = {'path': path, 'stamp': stamp, 'digest': digest}
+        self._keys[name] = digest
+
+    def add(self, name, filename, deps=(), params=None):
+        """Registers an output file built from deps (earlier sources or artifacts) and params."""
+        self._keys[name] = _hash(name, [self._keys[dep] for dep in deps], params)
+        self._artifacts[name] = os.path.join(self.output_dir, filename)
+
+    def names(self):
+        """Artifact names in registration order."""
+        return list(self._artifacts)
+
+    def key(self, name):
+        return self._keys[name]
+
+    def path(self, name):
+        return self._artifacts[name]
+
+    def stale(self):
+        """Names of the artifacts whose key changed or whose file is missing, in registration order."""
+        built = self.manifest['artifacts']
+        return [name for name, path in self._artifacts.items()
+                if built.get(name) != self._keys[name] or not os.path.exists(path)]
+
+    def mark_built(self, name):
+        self.manifest['artifacts'][name] = self._keys[name]
+
+    def save(self, **extra):
+        """Writes the manifest, with any extra JSON-able values (e.g. the run summary)."""
+        self.manifest.update(extra)
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=1, default=str)
+        os.replace(tmp, self.manifest_path)
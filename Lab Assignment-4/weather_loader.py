@@ -0,0 +1,85 @@
+"""
+Out-of-core loader for large weather CSVs.
+
+Only the columns the analysis needs are parsed, with compact dtypes
+(float32 metrics, categorical wind directions), and the file is read in
+chunks that are cleaned one at a time. write_clean_columnar() streams the
+cleaned chunks into an Arrow IPC (Feather) file while merging per-day
+statistics partials, so peak memory depends on the chunk size rather than
+the size of the file.
+"""
+import numpy as np
+import pandas as pd
+
+from weather_stats import compute_partials, merge_partials
+
+METRIC_COLUMNS = ['MinTemp', 'MaxTemp', 'Rainfall', 'Humidity3pm']
+WIND_COLUMNS = ['WindGustDir', 'WindDir9am', 'WindDir3pm']
+WIND_DTYPE = pd.CategoricalDtype(['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+                                  'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW'])
+START_DATE = '2008-12-01'
+
+
+def iter_clean_chunks(path, chunksize=100_000, start_date=START_DATE, wind=False):
+    """
+    Yields cleaned, Date-indexed chunks of a weather CSV: the metric columns
+    (plus wind directions if asked) with NaN rows dropped and MeanTemp added.
+    Files without a Date column get consecutive days from start_date, counted
+    over every row so dropped rows leave gaps, as in weather.py.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = METRIC_COLUMNS + (WIND_COLUMNS if wind else [])
+    missing = [c for c in METRIC_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    has_date = 'Date' in header
+    usecols = [c for c in wanted if c in header] + (['Date'] if has_date else [])
+    dtype = {c: np.float32 for c in METRIC_COLUMNS}
+    dtype.update({c: WIND_DTYPE for c in WIND_COLUMNS if c in usecols})
+
+    start = pd.Timestamp(start_date)
+    offset = 0
+    reader = pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunksize,
+                         parse_dates=['Date'] if has_date else False)
+    for chunk in reader:
+        if not has_date:
+            chunk['Date'] = start + pd.to_timedelta(np.arange(offset, offset + len(chunk)), unit='D')
+        offset += len(chunk)
+        chunk = chunk.dropna(subset=METRIC_COLUMNS)
+        chunk = chunk[['Date'] + [c for c in wanted if c in chunk.columns]]
+        chunk.insert(len(METRIC_COLUMNS) + 1, 'MeanTemp', (chunk['MinTemp'] + chunk['MaxTemp']) / 2)
+        yield chunk.set_index('Date')
+
+
+def write_clean_columnar(path, out_path, chunksize=100_000, start_date=START_DATE, wind=False):
+    """
+    Cleans a weather CSV chunk by chunk into an Arrow IPC (Feather) file.
+    Returns (rows written, per-day stats partials for weather_stats).
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Columnar weather output needs pyarrow: pip install pyarrow")
+
+    writer = schema = partials = None
+    rows = 0
+    try:
+        for chunk in iter_clean_chunks(path, chunksize, start_date, wind):
+            table = pa.Table.from_pandas(chunk, preserve_index=True)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_file(str(out_path), schema)
+            writer.write_table(table.cast(schema))
+            rows += len(chunk)
+            chunk_partials = compute_partials(chunk)
+            partials = chunk_partials if partials is None else merge_partials(partials, chunk_partials)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows, partials
+
+
+def read_clean_columnar(path):
+    """Loads a cleaned Feather file written by write_clean_columnar, memory-mapped."""
+    import pyarrow.feather as feather
+    return feather.read_table(str(path), memory_map=True).to_pandas()
@@ -0,0 +1,190 @@
+"""
+Single-pass statistics engine for the weather analysis.
+
+compute_partials() makes one vectorized pass over the observations and
+keeps, for every day and metric, the partial moments count, sum, sum of
+squares, min and max. Partials from different files or stations merge by
+adding or min/max-ing them (merge_partials). Every table weather.py prints
+(overall, monthly, yearly, month-of-year and seasonal) is then derived from
+the small per-day table instead of rescanning the observations.
+"""
+import numpy as np
+import pandas as pd
+
+METRICS = ['MeanTemp', 'Rainfall', 'Humidity3pm']
+PARTS = ['count', 'sum', 'sumsq', 'min', 'max']
+_REDUCERS = [np.add, np.add, np.add, np.minimum, np.maximum]
+
+# Season of each month number (index 0 is unused), as codes into SEASON_NAMES
+SEASON_NAMES = np.array(['Winter', 'Spring', 'Summer', 'Autumn'])
+SEASON_OF_MONTH = np.array([-1, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+
+
+def season_of(months):
+    """Vectorized month number -> season name lookup."""
+    return SEASON_NAMES[SEASON_OF_MONTH[np.asarray(months)]]
+
+
+def _reduce_groups(codes, parts):
+    """
+    Reduces a (rows, metrics, PARTS) array by integer group code.
+    Returns (sorted unique codes, (groups, metrics, PARTS) array).
+    """
+    if not len(codes):
+        return codes, np.empty((0,) + parts.shape[1:])
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    parts = parts[order]
+    reduced = np.empty((len(starts),) + parts.shape[1:])
+    for i, ufunc in enumerate(_REDUCERS):
+        reduced[..., i] = ufunc.reduceat(parts[..., i], starts, axis=0)
+    return codes[starts], reduced
+
+
+def _to_frame(days, parts, metrics, integer_metrics):
+    index = pd.DatetimeIndex(days.astype('datetime64[D]'), name='Date')
+    columns = pd.MultiIndex.from_product([metrics, PARTS])
+    partials = pd.DataFrame(parts.reshape(len(days), -1), index=index, columns=columns)
+    # Integer columns keep integer sums and extremes in the derived tables, as pandas does
+    partials.attrs['integer_metrics'] = list(integer_metrics)
+    return partials
+
+
+def _unpack(partials):
+    metrics = list(dict.fromkeys(partials.columns.get_level_values(0)))
+    return metrics, partials.to_numpy().reshape(len(partials), len(metrics), len(PARTS))
+
+
+def compute_partials(frame, metrics=METRICS):
+    """
+    Per-day partial moments for every metric column of a Date-indexed frame,
+    in one pass. NaNs are left out of the counts.
+    """
+    values = frame[metrics].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    parts = np.stack([
+        valid.astype(np.float64),
+        filled,
+        filled * filled,
+        np.where(valid, values, np.inf),
+        np.where(valid, values, -np.inf),
+    ], axis=-1)
+    days = frame.index.values.astype('datetime64[D]').astype(np.int64)
+    days, reduced = _reduce_groups(days, parts)
+    integer_metrics = [m for m in metrics if pd.api.types.is_integer_dtype(frame[m])]
+    return _to_frame(days, reduced, metrics, integer_metrics)
+
+
+def merge_partials(*tables):
+    """Combines partials from several chunks, files or stations into one per-day table."""
+    metrics, parts = _unpack(pd.concat(tables))
+    days = np.concatenate([t.index.values.astype('datetime64[D]').astype(np.int64) for t in tables])
+    days, reduced = _reduce_groups(days, parts)
+    integer_metrics = set.intersection(*(set(t.attrs.get('integer_metrics', ())) for t in tables))
+    return _to_frame(days, reduced, metrics, [m for m in metrics if m in integer_metrics])
+
+
+def _stat_columns(metric, stats, count, total, mean, var, low, high, ddof, integer=False):
+    """{(metric, stat): values} from per-group count, sum, mean, variance and extremes."""
+    columns = {}
+    for stat in stats:
+        if stat == 'mean':
+            values = mean
+        elif stat == 'sum':
+            values = total
+        elif stat == 'count':
+            values = count
+        elif stat == 'min':
+            values = np.where(count > 0, low, np.nan)
+        elif stat == 'max':
+            values = np.where(count > 0, high, np.nan)
+        elif stat == 'std':
+            values = np.where(count > ddof, np.sqrt(var), np.nan)
+        else:
+            raise ValueError(f"Unknown statistic: {stat}")
+        if integer and stat in ('sum', 'min', 'max') and not np.isnan(values).any():
+            values = values.astype(np.int64)
+        columns[(metric, stat)] = values
+    return columns
+
+
+def _finish(parts, metrics, spec, ddof, integer_metrics=()):
+    """Turns reduced partials into {(metric, stat): values} for the stats in spec."""
+    columns = {}
+    for metric, stats in spec.items():
+        count, total, sumsq, low, high = np.moveaxis(parts[:, metrics.index(metric), :], -1, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            var = np.maximum(sumsq - total * mean, 0.0) / (count - ddof)
+        columns.update(_stat_columns(metric, stats, count, total, mean, var, low, high, ddof,
+                                     metric in integer_metrics))
+    return columns
+
+
+def overall_stats(partials, spec, ddof=0):
+    """{metric: {stat: value}} over every day, e.g. the script's daily statistics."""
+    metrics, parts = _unpack(partials)
+    _, reduced = _reduce_groups(np.zeros(len(partials), dtype=np.int64), parts)
+    columns = _finish(reduced, metrics, spec, ddof)
+    return {metric: {stat: float(columns[(metric, stat)][0]) for stat in stats}
+            for metric, stats in spec.items()}
+
+
+def group_codes(index, by):
+    """Integer group code of every date in a DatetimeIndex for summarize()'s groupings."""
+    if by == 'month':
+        return np.asarray(index.year * 12 + index.month - 1, dtype=np.int64)
+    elif by == 'year':
+        return np.asarray(index.year, dtype=np.int64)
+    elif by == 'month_of_year':
+        return np.asarray(index.month, dtype=np.int64)
+    elif by == 'season':
+        return SEASON_OF_MONTH[np.asarray(index.month)]
+    raise ValueError(f"Unknown grouping: {by}")
+
+
+def _make_table(columns, groups, by, name='Date'):
+    """Labels {(metric, stat): values} computed per group code the way summarize() does."""
+    if by == 'month':
+        labels = pd.to_datetime(pd.DataFrame({'year': groups // 12, 'month': groups % 12 + 1, 'day': 1}))
+        labels = pd.DatetimeIndex(labels + pd.offsets.MonthEnd(0), name=name)
+    elif by == 'year':
+        labels = pd.DatetimeIndex(pd.to_datetime(pd.DataFrame({'year': groups, 'month': 12, 'day': 31})),
+                                  name=name)
+    elif by == 'month_of_year':
+        labels = pd.Index(groups, name=name)
+    else:
+        labels = pd.Index(SEASON_NAMES[groups], name='Season')
+
+    table = pd.DataFrame(columns, index=labels)
+    table.columns = pd.MultiIndex.from_tuples(table.columns)
+    return table.sort_index() if by == 'season' else table
+
+
+def summarize(partials, by, spec, ddof=1):
+    """
+    Derives a (metric, stat) table from per-day partials.
+
+    by='month' or 'year' gives one row per calendar month (labelled by month
+    end) or year (labelled by 31 December), including empty periods, like
+    resample('M') / resample('Y'). by='month_of_year' groups months across
+    years and by='season' groups by SEASON_NAMES, like a groupby.
+    std is the sample standard deviation unless ddof says otherwise.
+    """
+    metrics, parts = _unpack(partials)
+    groups, reduced = _reduce_groups(group_codes(partials.index, by), parts)
+
+    if by in ('month', 'year') and len(groups):
+        # Fill the gaps between the first and last period with empty rows
+        full = np.arange(groups[0], groups[-1] + 1)
+        filled = np.zeros((len(full),) + reduced.shape[1:])
+        filled[..., PARTS.index('min')] = np.inf
+        filled[..., PARTS.index('max')] = -np.inf
+        filled[groups - groups[0]] = reduced
+        groups, reduced = full, filled
+
+    integer_metrics = partials.attrs.get('integer_metrics', ())
+    return _make_table(_finish(reduced, metrics, spec, ddof, integer_metrics), groups, by,
+                       partials.index.name)
@@ -0,0 +1,289 @@
+"""
+Streaming statistics for live weather feeds.
+
+StreamingStats takes observation records one at a time (update) or in
+small batches (update_batch) and keeps, with constant work per record:
+
+- Welford running count/mean/variance plus sum, min and max for every
+  calendar month, year, month of the year and season, and overall, so
+  table() and overall() give the same tables weather.py prints without
+  rescanning the data;
+- rolling 7- and 30-day windows ending at the latest observation, where
+  Welford updates are undone as observations leave the window and
+  monotonic queues track the window min and max.
+
+Records are cleaned the way weather.py cleans the CSV: a record missing
+any of MinTemp, MaxTemp, Rainfall or Humidity3pm is dropped, and MeanTemp
+is derived from MinTemp and MaxTemp when the record has none.
+"""
+import math
+import time
+import argparse
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from weather_stats import METRICS, SEASON_OF_MONTH, _stat_columns, _make_table
+
+KEY_COLUMNS = ['MinTemp', 'MaxTemp', 'Rainfall', 'Humidity3pm']
+GROUPINGS = ['month', 'year', 'month_of_year', 'season']
+WINDOWS = (7, 30)
+WINDOW_STATS = ['count', 'mean', 'std', 'min', 'max', 'sum']
+
+
+class RunningStats:
+    """Welford accumulator: count, mean, sum of squared deviations, sum, min and max."""
+    __slots__ = ('count', 'mean', 'm2', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def remove(self, x):
+        """Undoes add(x); min and max are left to the caller (see RollingWindow)."""
+        self.count -= 1
+        if self.count == 0:
+            self.mean = self.m2 = self.total = 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(self.m2 - delta * (x - self.mean), 0.0)
+        self.total -= x
+
+    def std(self, ddof=1):
+        return math.sqrt(self.m2 / (self.count - ddof)) if self.count > ddof else math.nan
+
+
+class RollingWindow:
+    """Statistics over the observations of the last `days` days, like rolling(f'{days}D')."""
+
+    def __init__(self, days, metrics=METRICS):
+        self.days = days
+        self.metrics = list(metrics)
+        self.end = None
+        self._seq = 0
+        self._obs = deque()  # (day, seq, values) in arrival order
+        self._stats = [RunningStats() for _ in self.metrics]
+        self._min = [deque() for _ in self.metrics]  # (seq, value), values increasing
+        self._max = [deque() for _ in self.metrics]  # (seq, value), values decreasing
+
+    def add(self, day, values):
+        """Adds one observation; day is a day number that must not go backwards."""
+        self.end = day
+        seq = self._seq
+        self._seq += 1
+        self._obs.append((day, seq, values))
+        for i, x in enumerate(values):
+            self._stats[i].add(x)
+            low, high = self._min[i], self._max[i]
+            while low and low[-1][1] >= x:
+                low.pop()
+            low.append((seq, x))
+            while high and high[-1][1] <= x:
+                high.pop()
+            high.append((seq, x))
+
+        # Evict observations that fell out of (end - days, end]
+        obs = self._obs
+        while obs[0][0] <= day - self.days:
+            _, old_seq, old_values = obs.popleft()
+            for i, x in enumerate(old_values):
+                self._stats[i].remove(x)
+                if self._min[i][0][0] == old_seq:
+                    self._min[i].popleft()
+                if self._max[i][0][0] == old_seq:
+                    self._max[i].popleft()
+
+    def snapshot(self):
+        """{metric: {stat: value}} for the current window, with sample std."""
+        result = {}
+        for i, metric in enumerate(self.metrics):
+            acc = self._stats[i]
+            if acc.count == 0:
+                result[metric] = {'count': 0, 'mean': math.nan, 'std': math.nan,
+                                  'min': math.nan, 'max': math.nan, 'sum': 0.0}
+                continue
+            low, high = self._min[i][0][1], self._max[i][0][1]
+            # Removals leave rounding residue; a constant window is known exactly
+            flat = low == high
+            result[metric] = {
+                'count': acc.count,
+                'mean': low if flat else acc.mean,
+                'std': 0.0 if flat and acc.count > 1 else acc.std(),
+                'min': low,
+                'max': high,
+                'sum': low * acc.count if flat else acc.total,
+            }
+        return result
+
+
+class StreamingStats:
+    """Incrementally maintained weather statistics for a live feed of observation records."""
+
+    def __init__(self, metrics=METRICS, windows=WINDOWS):
+        self.metrics = list(metrics)
+        self.records = 0
+        self.dropped = 0
+        self.late = 0
+        self._groups = {by: {} for by in GROUPINGS + ['all']}
+        self._integer = [True] * len(self.metrics)
+        self.windows = {days: RollingWindow(days, self.metrics) for days in windows}
+
+    def _values(self, record):
+        """Cleans one record into metric values, or None if weather.py would drop it."""
+        get = record.get
+        for column in KEY_COLUMNS:
+            x = get(column)
+            if x is None or x != x:
+                return None
+        values = []
+        for metric in self.metrics:
+            x = get(metric)
+            if x is None and metric == 'MeanTemp':
+                x = (get('MinTemp') + get('MaxTemp')) / 2
+            if x is None or x != x:
+                return None
+            values.append(x)
+        return values
+
+    def update(self, record):
+        """
+        Adds one observation: a mapping with a 'Date' and the weather columns.
+        Returns False if the record was dropped by cleaning.
+        """
+        values = self._values(record)
+        if values is None:
+            self.dropped += 1
+            return False
+        date = pd.Timestamp(record['Date'])
+        self.records += 1
+
+        for i, x in enumerate(values):
+            if self._integer[i] and not isinstance(x, (int, np.integer)):
+                self._integer[i] = False
+        values = [float(x) for x in values]
+
+        year, month = date.year, date.month
+        codes = (('month', year * 12 + month - 1), ('year', year), ('month_of_year', month),
+                 ('season', int(SEASON_OF_MONTH[month])), ('all', 0))
+        for by, code in codes:
+            group = self._groups[by].get(code)
+            if group is None:
+                group = self._groups[by][code] = [RunningStats() for _ in self.metrics]
+            for acc, x in zip(group, values):
+                acc.add(x)
+
+        day = date.toordinal()
+        for window in self.windows.values():
+            if window.end is not None and day < window.end:
+                # Late records still count towards their calendar groups
+                self.late += 1
+                break
+            window.add(day, values)
+        return True
+
+    def update_batch(self, records):
+        """Adds a small batch: an iterable of record mappings or a DataFrame with a Date column or index."""
+        if isinstance(records, pd.DataFrame):
+            frame = records if 'Date' in records.columns else records.reset_index()
+            records = frame.to_dict('records')
+        return sum(self.update(record) for record in records)
+
+    def _columns(self, by, codes, spec, ddof):
+        groups = self._groups[by]
+        empty = [RunningStats() for _ in self.metrics]
+        accs = [groups.get(code, empty) for code in codes]
+        columns = {}
+        for metric, stats in spec.items():
+            i = self.metrics.index(metric)
+            count = np.array([a[i].count for a in accs], dtype=np.float64)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                var = np.array([a[i].m2 for a in accs]) / (count - ddof)
+            mean = np.where(count > 0, [a[i].mean for a in accs], np.nan)
+            columns.update(_stat_columns(metric, stats, count, np.array([a[i].total for a in accs]),
+                                         mean, var, np.array([a[i].min for a in accs]),
+                                         np.array([a[i].max for a in accs]), ddof, self._integer[i]))
+        return columns
+
+    def overall(self, spec, ddof=0):
+        """{metric: {stat: value}} over every record so far, like weather_stats.overall_stats."""
+        columns = self._columns('all', [0], spec, ddof)
+        return {metric: {stat: float(columns[(metric, stat)][0]) for stat in stats}
+                for metric, stats in spec.items()}
+
+    def table(self, by, spec, ddof=1):
+        """The (metric, stat) table weather_stats.summarize(partials, by, spec) gives for the same data."""
+        if by not in GROUPINGS:
+            raise ValueError(f"Unknown grouping: {by}")
+        codes = np.array(sorted(self._groups[by]), dtype=np.int64)
+        if by in ('month', 'year') and len(codes):
+            codes = np.arange(codes[0], codes[-1] + 1)
+        return _make_table(self._columns(by, codes, spec, ddof), codes, by)
+
+    def rolling(self):
+        """Current rolling-window statistics, one row per (window, metric)."""
+        rows = {}
+        for days, window in self.windows.items():
+            for metric, stats in window.snapshot().items():
+                rows[(f'{days}D', metric)] = stats
+        table = pd.DataFrame.from_dict(rows, orient='index', columns=WINDOW_STATS)
+        table.index.names = ['Window', 'Metric']
+        return table
+
+
+def replay(path, batch_size=1, start_date='2008-12-01'):
+    """Feeds a weather CSV through StreamingStats in batches of batch_size records, like a live feed."""
+    stream = StreamingStats()
+    offset = 0
+    for chunk in pd.read_csv(path, chunksize=batch_size):
+        if 'Date' not in chunk.columns:
+            chunk['Date'] = pd.date_range(start=start_date, periods=len(chunk), freq='D') \
+                + pd.Timedelta(days=offset)
+        offset += len(chunk)
+        stream.update_batch(chunk)
+    return stream
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a weather CSV through the streaming statistics")
+    parser.add_argument('input', nargs='?', default='weather.csv', help="station CSV to replay")
+    parser.add_argument('--batch-size', type=int, default=1, help="records per update")
+    parser.add_argument('--start-date', default='2008-12-01', help="first date for files without a Date column")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    stream = replay(args.input, args.batch_size, args.start_date)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {stream.records} records ({stream.dropped} dropped, {stream.late} late) "
+          f"in {elapsed:.2f}s")
+
+    spec = {metric: ['mean', 'min', 'max', 'std'] for metric in stream.metrics}
+    print("\nDaily Statistics:")
+    for var, stats in stream.overall(spec).items():
+        print(f"{var}: Mean={stats['mean']:.2f}, Min={stats['min']:.2f}, Max={stats['max']:.2f}, Std={stats['std']:.2f}")
+    print("\nMonthly Statistics (first 5 months):")
+    print(stream.table('month', spec).head())
+    print("\nYearly Statistics:")
+    print(stream.table('year', spec))
+    print("\nRolling windows:")
+    print(stream.rolling())
+
+
+if __name__ == "__main__":
+    main()
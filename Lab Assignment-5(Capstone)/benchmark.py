@@ -0,0 +1,217 @@
+"""
+Benchmarks for the campus energy pipeline in code.py.
+
+stages: generates N buildings x M months of synthetic meter data for each
+requested size, then times and memory-profiles every pipeline stage and
+writes the results as JSON so runs can be compared between releases.
+
+    python benchmark.py stages --sizes 3x2 20x12 --freq h --seed 0 --output bench.json
+
+memory: bytes per meter reading for the original object model (one
+__dict__-based MeterReading per row in a list) versus slotted readings and
+the buffer-backed Building.
+
+    python benchmark.py memory --readings 200000
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# code.py shares its name with the standard library module, so load it by path
+_spec = importlib.util.spec_from_file_location('capstone', Path(__file__).with_name('code.py'))
+capstone = importlib.util.module_from_spec(_spec)
+sys.modules['capstone'] = capstone
+_spec.loader.exec_module(capstone)
+
+
+class LegacyMeterReading:
+    """The original reading model: a plain object with a per-instance __dict__."""
+    def __init__(self, timestamp, kwh):
+        self.timestamp = timestamp
+        self.kwh = kwh
+
+
+def _traced_bytes(build):
+    """Returns the bytes still allocated by build() once it has returned."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def benchmark_reading_memory(n_readings):
+    timestamps = pd.date_range('2023-01-01', periods=n_readings, freq='h')
+    kwh = np.random.default_rng(0).uniform(10, 100, n_readings)
+
+    def legacy():
+        return [LegacyMeterReading(ts, float(k)) for ts, k in zip(timestamps, kwh)]
+
+    def slotted():
+        return [capstone.MeterReading(ts, float(k)) for ts, k in zip(timestamps, kwh)]
+
+    def columnar():
+        building = capstone.Building('Bench')
+        building.add_readings(timestamps.to_numpy(), kwh)
+        return building
+
+    results = {}
+    for name, build in [('legacy objects', legacy), ('slotted objects', slotted), ('columnar Building', columnar)]:
+        results[name] = _traced_bytes(build) / n_readings
+    return results
+
+
+def _measure(func, *args, trace_memory=True):
+    """
+    Runs func(*args) with its console output suppressed.
+    Returns (result, wall seconds, peak traced bytes or None).
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _populate(df):
+    manager = capstone.BuildingManager()
+    manager.populate_from_dataframe(df)
+    return manager
+
+
+def benchmark_stages(n_buildings, n_months, freq='h', seed=None, malformed_rate=0.0,
+                     workers=None, trace_memory=True):
+    """
+    Times each pipeline stage on freshly generated data of the given size.
+    Outputs are written to a temporary directory, which is removed afterwards.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        data_dir = Path(workdir) / 'data'
+        _, gen_seconds, _ = _measure(capstone.generate_synthetic_data, data_dir, n_buildings, n_months,
+                                     freq, '2023-01-01', seed, malformed_rate, trace_memory=False)
+
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            df, seconds, peak = _measure(capstone.ingest_and_validate_data, data_dir, workers,
+                                         trace_memory=trace_memory)
+            rows = len(df)
+            timings = [('ingest_and_validate_data', seconds, peak)]
+
+            summary = None
+            stages = [
+                ('calculate_daily_totals', capstone.calculate_daily_totals),
+                ('calculate_weekly_aggregates', capstone.calculate_weekly_aggregates),
+                ('building_wise_summary', capstone.building_wise_summary),
+                ('populate_from_dataframe', _populate),
+                ('create_dashboard', lambda frame: capstone.create_dashboard(frame, headless=True)),
+            ]
+            for name, stage in stages:
+                result, seconds, peak = _measure(stage, df, trace_memory=trace_memory)
+                timings.append((name, seconds, peak))
+                if name == 'building_wise_summary':
+                    summary = result
+
+            _, seconds, peak = _measure(capstone.export_data_and_summary, df, summary,
+                                        trace_memory=trace_memory)
+            timings.append(('export_data_and_summary', seconds, peak))
+        finally:
+            os.chdir(cwd)
+
+    results = [{
+        'buildings': n_buildings,
+        'months': n_months,
+        'freq': freq,
+        'rows': rows,
+        'stage': 'generate_synthetic_data',
+        'seconds': gen_seconds,
+        'peak_bytes': None,
+    }]
+    for name, seconds, peak in timings:
+        results.append({
+            'buildings': n_buildings,
+            'months': n_months,
+            'freq': freq,
+            'rows': rows,
+            'stage': name,
+            'seconds': seconds,
+            'peak_bytes': peak,
+        })
+    return results
+
+
+def _parse_size(text):
+    buildings, months = text.lower().split('x')
+    return int(buildings), int(months)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Energy pipeline benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stages_parser = commands.add_parser('stages', help="time and memory-profile each pipeline stage")
+    stages_parser.add_argument('--sizes', nargs='+', default=['3x2', '10x6', '30x12'],
+                               help="sizes as <buildings>x<months>")
+    stages_parser.add_argument('--freq', default='h', help="reading frequency, e.g. h or 15min")
+    stages_parser.add_argument('--seed', type=int, default=None, help="seed for deterministic data")
+    stages_parser.add_argument('--malformed-rate', type=float, default=0.0,
+                               help="fraction of extra malformed lines per file")
+    stages_parser.add_argument('--workers', type=int, default=None, help="ingestion worker processes")
+    stages_parser.add_argument('--no-memory', action='store_true',
+                               help="skip tracemalloc, which slows the timed stages")
+    stages_parser.add_argument('--output', default='benchmark_results.json', help="JSON results file")
+
+    memory_parser = commands.add_parser('memory', help="bytes per reading for each model")
+    memory_parser.add_argument('--readings', type=int, default=200_000, help="number of readings to model")
+    args = parser.parse_args()
+
+    if args.command == 'memory':
+        print(f"Memory per reading ({args.readings} readings):")
+        for name, per_reading in benchmark_reading_memory(args.readings).items():
+            print(f"  {name:<18} {per_reading:8.1f} bytes")
+    else:
+        results = []
+        for size in args.sizes:
+            n_buildings, n_months = _parse_size(size)
+            print(f"Benchmarking {n_buildings} buildings x {n_months} months ({args.freq})...")
+            size_results = benchmark_stages(n_buildings, n_months, args.freq, args.seed, args.malformed_rate,
+                                            args.workers, trace_memory=not args.no_memory)
+            for r in size_results:
+                peak = f"{r['peak_bytes'] / 1e6:9.1f} MB" if r['peak_bytes'] is not None else f"{'-':>12}"
+                print(f"  {r['stage']:<28} {r['seconds']:8.3f}s {peak}")
+            results.extend(size_results)
+
+        report = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
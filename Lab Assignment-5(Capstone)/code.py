@@ -1,13 +1,33 @@
 import os
+import json
+import hashlib
+import heapq
+import argparse
+import time
+import cProfile
+import warnings
+import contextlib
+import tracemalloc
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
-from datetime import datetime, timedelta
-import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 # Task 1: Data Ingestion and Validation
-def ingest_and_validate_data(data_dir):
-    df_combined = pd.DataFrame()
+METER_COLUMNS = ['timestamp', 'kwh']
+METER_DTYPES = {'kwh': 'float64'}
+
+def find_meter_files(data_dir):
+    """
+    Lists the meter CSVs in data_dir, generating sample data if there are none.
+    """
     data_path = Path(data_dir)
     
     csv_files = list(data_path.glob('*.csv')) if data_path.exists() else []
@@ -17,27 +37,153 @@ def ingest_and_validate_data(data_dir):
         generate_sample_data(data_dir)
         csv_files = list(data_path.glob('*.csv'))
     
-    for file in csv_files:
-        try:
-            df = pd.read_csv(file, on_bad_lines='skip')
-            
-            parts = file.stem.split('_')
-            if len(parts) >= 2:
-                building_name = parts[0]
-                month = parts[1]
-                df['building'] = building_name
-                df['month'] = month
-            else:
-                print(f"Filename {file.name} does not match expected format. Skipping metadata addition.")
-            
-            # Append to combined DataFrame
-            df_combined = pd.concat([df_combined, df], ignore_index=True)
-            print(f"Successfully read and appended {file.name}")
+    return csv_files
+
+def parse_file_metadata(file):
+    """
+    Splits a <building>_<month>.csv filename into (building, month).
+    Returns (None, None) if the name does not match that format.
+    """
+    parts = file.stem.split('_')
+    if len(parts) >= 2:
+        return parts[0], parts[1]
+    return None, None
+
+def read_meter_file(file):
+    """
+    Parses and validates one meter CSV and attaches its building/month.
+    Returns (df, messages); df is None if the file could not be read.
+    This is the unit of work handed to worker processes in parallel mode.
+    """
+    messages = []
+    try:
+        # Malformed lines are skipped but counted so they can be reported per file
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', pd.errors.ParserWarning)
+            df = pd.read_csv(file, on_bad_lines='warn')
+        bad_lines = sum(str(w.message).count('Skipping line') for w in caught
+                        if issubclass(w.category, pd.errors.ParserWarning))
         
-        except FileNotFoundError:
-            print(f"File {file.name} not found. Skipping.")
-        except Exception as e:
-            print(f"Error reading {file.name}: {e}. Skipping.")
+        building_name, month = parse_file_metadata(file)
+        if building_name is not None:
+            df['building'] = building_name
+            df['month'] = month
+        else:
+            messages.append(f"Filename {file.name} does not match expected format. Skipping metadata addition.")
+        
+        if 'timestamp' in df.columns:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+        
+        messages.append(f"Successfully read and appended {file.name}")
+        if bad_lines:
+            messages.append(f"Skipped {bad_lines} malformed line(s) in {file.name}")
+        return df, messages
+    
+    except FileNotFoundError:
+        messages.append(f"File {file.name} not found. Skipping.")
+    except Exception as e:
+        messages.append(f"Error reading {file.name}: {e}. Skipping.")
+    return None, messages
+
+class MeterCache:
+    """
+    Persistent columnar cache of parsed meter files. Each source CSV is stored
+    as an uncompressed Feather file keyed by its path, size and mtime, so an
+    unchanged file is memory-mapped back in without being parsed again.
+    """
+    def __init__(self, cache_dir):
+        try:
+            import pyarrow.feather as feather
+        except ImportError:
+            raise ImportError("The meter cache needs pyarrow: pip install pyarrow")
+        self.feather = feather
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.cache_dir / 'manifest.json'
+        self.manifest = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+    
+    def _key(self, file):
+        return str(Path(file).resolve())
+    
+    def _entry_path(self, file):
+        digest = hashlib.sha1(self._key(file).encode()).hexdigest()[:16]
+        return self.cache_dir / f"{Path(file).stem}-{digest}.feather"
+    
+    def load(self, file):
+        """
+        Returns the cached frame for file, or None if it is missing or stale.
+        """
+        entry = self.manifest.get(self._key(file))
+        stat = Path(file).stat()
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            return None
+        entry_path = self.cache_dir / entry['cache_file']
+        if not entry_path.exists():
+            return None
+        return self.feather.read_table(entry_path, memory_map=True).to_pandas()
+    
+    def store(self, file, df):
+        stat = Path(file).stat()
+        entry_path = self._entry_path(file)
+        self.feather.write_feather(df.reset_index(drop=True), entry_path, compression='uncompressed')
+        self.manifest[self._key(file)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'cache_file': entry_path.name,
+        }
+    
+    def save(self):
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+def ingest_and_validate_data(data_dir, workers=None, cache_dir=None):
+    """
+    Reads every meter CSV in data_dir into one DataFrame.
+    With workers > 1 the files are parsed in a process pool; per-file frames
+    are concatenated once at the end and messages are printed in file order.
+    With cache_dir, unchanged files are loaded from the MeterCache and only
+    new or modified files are parsed (and then added to the cache).
+    """
+    csv_files = find_meter_files(data_dir)
+    
+    cache = MeterCache(cache_dir) if cache_dir else None
+    cached = {}
+    if cache is not None:
+        for file in csv_files:
+            df = cache.load(file)
+            if df is not None:
+                cached[file] = df
+    stale_files = [file for file in csv_files if file not in cached]
+    
+    if workers and workers > 1 and len(stale_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = dict(zip(stale_files, pool.map(read_meter_file, stale_files)))
+    else:
+        parsed = {file: read_meter_file(file) for file in stale_files}
+    
+    frames = []
+    for file in csv_files:
+        if file in cached:
+            print(f"Loaded {file.name} from cache")
+            frames.append(cached[file])
+            continue
+        df, messages = parsed[file]
+        for message in messages:
+            print(message)
+        if df is not None:
+            frames.append(df)
+            if cache is not None:
+                cache.store(file, df)
+    
+    if cache is not None and stale_files:
+        cache.save()
+    
+    df_combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     
     # Ensure timestamp is datetime
     if 'timestamp' in df_combined.columns:
@@ -45,40 +191,132 @@ def ingest_and_validate_data(data_dir):
     
     return df_combined
 
-def generate_sample_data(data_dir):
+def validate_chunk(df):
     """
-    Generates sample CSV files for demonstration.
-    Creates data for 3 buildings over 2 months, with hourly readings.
+    Coerces timestamps and drops rows without a usable timestamp or kWh value.
+    """
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    return df.dropna(subset=METER_COLUMNS)
+
+def stream_meter_data(data_dir, chunksize=100_000):
+    """
+    Yields validated chunks of at most `chunksize` rows from each meter CSV.
+    Timestamps are parsed during the read with explicit dtypes, so peak memory
+    is bounded by the chunk size rather than by the whole dataset.
+    """
+    for file in find_meter_files(data_dir):
+        building_name, month = parse_file_metadata(file)
+        if building_name is None:
+            print(f"Filename {file.name} does not match expected format. Skipping metadata addition.")
+        try:
+            reader = pd.read_csv(file, usecols=METER_COLUMNS, dtype=METER_DTYPES,
+                                 parse_dates=['timestamp'], chunksize=chunksize,
+                                 on_bad_lines='skip')
+            for chunk in reader:
+                chunk = validate_chunk(chunk)
+                if building_name is not None:
+                    chunk['building'] = building_name
+                    chunk['month'] = month
+                yield chunk
+            print(f"Successfully streamed {file.name}")
+        
+        except FileNotFoundError:
+            print(f"File {file.name} not found. Skipping.")
+        except Exception as e:
+            print(f"Error reading {file.name}: {e}. Skipping.")
+
+def generate_synthetic_data(data_dir, n_buildings=3, n_months=2, freq='h', start='2023-01-01',
+                            seed=None, malformed_rate=0.0):
     """
-    buildings = ['BuildingA', 'BuildingB', 'BuildingC']
-    months = ['Jan', 'Feb']
-    start_date = datetime(2023, 1, 1)
+    Writes one <building>_<month>.csv per building and month, with readings
+    every `freq` drawn uniformly from 10-100 kWh. Each file is generated as
+    whole arrays rather than row by row. A seed makes the output
+    deterministic, and malformed_rate inserts that fraction of extra lines
+    with too many fields to exercise bad-line handling.
+    """
+    rng = np.random.default_rng(seed)
+    if n_buildings <= 26:
+        buildings = [f"Building{chr(ord('A') + i)}" for i in range(n_buildings)]
+    else:
+        buildings = [f"Building{i + 1:03d}" for i in range(n_buildings)]
+    month_starts = pd.date_range(start, periods=n_months + 1, freq='MS')
+    month_format = '%b' if month_starts[0].year == month_starts[-2].year else '%b%Y'
     
     os.makedirs(data_dir, exist_ok=True)
     
     for building in buildings:
-        for month in months:
-            data = []
-            current_date = start_date
-            if month == 'Feb':
-                current_date = datetime(2023, 2, 1)
+        for month_start, month_end in zip(month_starts[:-1], month_starts[1:]):
+            timestamps = pd.date_range(month_start, month_end, freq=freq, inclusive='left')
+            kwh = rng.uniform(10, 100, len(timestamps))
+            lines = (timestamps.strftime('%Y-%m-%d %H:%M:%S') + ',' + pd.Index(kwh.astype(str))).to_numpy()
             
-            # Generate hourly data for the month
-            while current_date.month == (1 if month == 'Jan' else 2):
-                kwh = random.uniform(10, 100)  # Random kWh consumption
-                data.append({'timestamp': current_date, 'kwh': kwh})
-                current_date += timedelta(hours=1)
+            if malformed_rate > 0:
+                bad_rows = np.flatnonzero(rng.random(len(lines)) < malformed_rate)
+                lines = np.insert(lines, bad_rows, lines[bad_rows] + ',' + kwh[bad_rows].astype(str))
             
-            df = pd.DataFrame(data)
-            filename = f"{building}_{month}.csv"
-            df.to_csv(Path(data_dir) / filename, index=False)
+            filename = f"{building}_{month_start.strftime(month_format)}.csv"
+            with open(Path(data_dir) / filename, 'w') as f:
+                f.write('timestamp,kwh\n')
+                f.write('\n'.join(lines))
+                f.write('\n')
             print(f"Generated sample file: {filename}")
 
+def generate_sample_data(data_dir):
+    """
+    Generates sample CSV files for demonstration.
+    Creates data for 3 buildings over 2 months, with hourly readings.
+    """
+    generate_synthetic_data(data_dir, n_buildings=3, n_months=2, freq='h', start='2023-01-01')
+
 # Task 2: Core Aggregation Logic
+# Each aggregator accepts either a DataFrame or an iterable of chunks (such as
+# stream_meter_data). Chunks are reduced to small partial results and merged,
+# so only one chunk of raw readings is in memory at a time.
+def _is_stream(data):
+    return not isinstance(data, pd.DataFrame)
+
+def _merge_totals(running, partial):
+    if partial.empty:
+        return running
+    if running is None:
+        return partial
+    return running.add(partial, fill_value=0)
+
+def _finish_totals(running, freq):
+    if running is None:
+        return pd.Series(dtype='float64', name='kwh')
+    return running.sort_index().asfreq(freq, fill_value=0)
+
+def _summary_partial(df):
+    if 'building' not in df.columns or 'kwh' not in df.columns:
+        print("Required columns 'building' and 'kwh' not found.")
+        return pd.DataFrame()
+    return df.groupby('building')['kwh'].agg(['count', 'sum', 'min', 'max'])
+
+def _merge_summary(running, partial):
+    if partial.empty:
+        return running
+    if running is None:
+        return partial
+    return pd.concat([running, partial]).groupby(level=0).agg(
+        {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'})
+
+def _finish_summary(running):
+    if running is None:
+        return pd.DataFrame()
+    summary = running.copy()
+    summary['mean'] = summary['sum'] / summary['count']
+    return summary[['mean', 'min', 'max', 'sum']]
+
 def calculate_daily_totals(df):
     """
     Calculates daily totals of kWh consumption.
     """
+    if _is_stream(df):
+        running = None
+        for chunk in df:
+            running = _merge_totals(running, calculate_daily_totals(chunk))
+        return _finish_totals(running, 'D')
     if 'timestamp' not in df.columns or 'kwh' not in df.columns:
         print("Required columns 'timestamp' and 'kwh' not found.")
         return pd.DataFrame()
@@ -88,6 +326,11 @@ def calculate_weekly_aggregates(df):
     """
     Calculates weekly aggregates of kWh consumption.
     """
+    if _is_stream(df):
+        running = None
+        for chunk in df:
+            running = _merge_totals(running, calculate_weekly_aggregates(chunk))
+        return _finish_totals(running, 'W')
     if 'timestamp' not in df.columns or 'kwh' not in df.columns:
         print("Required columns 'timestamp' and 'kwh' not found.")
         return pd.DataFrame()
@@ -97,27 +340,301 @@ def building_wise_summary(df):
     """
     Provides a summary per building: mean, min, max, total kWh.
     """
+    if _is_stream(df):
+        running = None
+        for chunk in df:
+            running = _merge_summary(running, _summary_partial(chunk))
+        return _finish_summary(running)
     if 'building' not in df.columns or 'kwh' not in df.columns:
         print("Required columns 'building' and 'kwh' not found.")
         return pd.DataFrame()
     return df.groupby('building')['kwh'].agg(['mean', 'min', 'max', 'sum'])
 
+def aggregate_stream(chunks):
+    """
+    Consumes a chunk stream once and returns
+    (daily_totals, weekly_aggregates, building_summary).
+    """
+    daily = weekly = summary = None
+    for chunk in chunks:
+        daily = _merge_totals(daily, calculate_daily_totals(chunk))
+        weekly = _merge_totals(weekly, calculate_weekly_aggregates(chunk))
+        summary = _merge_summary(summary, _summary_partial(chunk))
+    return _finish_totals(daily, 'D'), _finish_totals(weekly, 'W'), _finish_summary(summary)
+
+class RollupStore:
+    """
+    Incremental per-building rollups of the meter readings.
+    Keeps daily, weekly and hour-of-day partial aggregates (sum, count, min,
+    max, sum of squares) and merges in only readings newer than each
+    building's watermark, so a refresh costs time proportional to the new
+    data. Summaries and dashboard panels are then served from the rollups.
+    The feed is assumed to be append-only per building: readings older than
+    a building's watermark are treated as already merged.
+    """
+    COMBINE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max', 'sumsq': 'sum'}
+    
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.daily = None
+        self.weekly = None
+        self.hourly = None
+        self.watermarks = {}
+        if self.path is not None and self.path.exists():
+            state = pd.read_pickle(self.path)
+            self.daily = state['daily']
+            self.weekly = state['weekly']
+            self.hourly = state['hourly']
+            self.watermarks = state['watermarks']
+    
+    def save(self):
+        if self.path is None:
+            return
+        pd.to_pickle({
+            'daily': self.daily,
+            'weekly': self.weekly,
+            'hourly': self.hourly,
+            'watermarks': self.watermarks,
+        }, self.path)
+    
+    @staticmethod
+    def _partials(df, keys):
+        grouped = df.assign(sumsq=df['kwh'] ** 2).groupby(keys)
+        partials = grouped['kwh'].agg(['sum', 'count', 'min', 'max'])
+        partials['sumsq'] = grouped['sumsq'].sum()
+        return partials
+    
+    @staticmethod
+    def _merge(running, partial):
+        if running is None:
+            return partial
+        overlap = partial.index.intersection(running.index)
+        if len(overlap):
+            old, new = running.loc[overlap], partial.loc[overlap]
+            for col in ['sum', 'count', 'sumsq']:
+                running.loc[overlap, col] = old[col] + new[col]
+            running.loc[overlap, 'min'] = np.minimum(old['min'], new['min'])
+            running.loc[overlap, 'max'] = np.maximum(old['max'], new['max'])
+        fresh = partial.drop(overlap)
+        if fresh.empty:
+            return running
+        return pd.concat([running, fresh]).sort_index()
+    
+    def update(self, df):
+        """
+        Merges readings newer than each building's watermark into the rollups.
+        Returns the number of readings merged.
+        """
+        if df.empty:
+            return 0
+        watermark = pd.to_datetime(df['building'].map(self.watermarks))
+        new = df[watermark.isna() | (df['timestamp'] > watermark)]
+        new = new.dropna(subset=['timestamp', 'kwh'])
+        if new.empty:
+            return 0
+        
+        self.daily = self._merge(self.daily, self._partials(new, ['building', pd.Grouper(key='timestamp', freq='D')]))
+        self.weekly = self._merge(self.weekly, self._partials(new, ['building', pd.Grouper(key='timestamp', freq='W')]))
+        self.hourly = self._merge(self.hourly, self._partials(new, ['building', new['timestamp'].dt.hour.rename('hour')]))
+        
+        for building, latest in new.groupby('building')['timestamp'].max().items():
+            previous = self.watermarks.get(building)
+            self.watermarks[building] = latest if previous is None else max(previous, latest)
+        return len(new)
+    
+    def _totals(self, rollup, freq):
+        if rollup is None:
+            return pd.Series(dtype='float64', name='kwh')
+        totals = rollup['sum'].groupby(level='timestamp').sum().rename('kwh')
+        return totals.asfreq(freq, fill_value=0)
+    
+    def daily_totals(self):
+        return self._totals(self.daily, 'D')
+    
+    def weekly_totals(self):
+        return self._totals(self.weekly, 'W')
+    
+    def daily_by_building(self):
+        return self.daily['sum'].unstack('building')
+    
+    def weekly_by_building(self):
+        return self.weekly['sum'].unstack('building')
+    
+    def building_summary(self):
+        """
+        Same columns as building_wise_summary, plus the standard deviation.
+        """
+        if self.daily is None:
+            return pd.DataFrame()
+        totals = self.daily.groupby(level='building').agg(self.COMBINE)
+        summary = pd.DataFrame(index=totals.index)
+        summary['mean'] = totals['sum'] / totals['count']
+        summary['min'] = totals['min']
+        summary['max'] = totals['max']
+        summary['sum'] = totals['sum']
+        variance = totals['sumsq'] / totals['count'] - summary['mean'] ** 2
+        summary['std'] = np.sqrt(variance.clip(lower=0))
+        return summary
+    
+    def hourly_profile(self):
+        """
+        Mean, min and max kWh per building and hour of day.
+        """
+        profile = self.hourly[['min', 'max']].copy()
+        profile['mean'] = self.hourly['sum'] / self.hourly['count']
+        return profile
+
 # Task 3: Object-Oriented Modeling
 class MeterReading:
+    __slots__ = ('timestamp', 'kwh')
+    
     def __init__(self, timestamp, kwh):
         self.timestamp = timestamp
         self.kwh = kwh
 
+def _to_epoch(timestamp):
+    return np.datetime64(pd.Timestamp(timestamp).to_datetime64(), 's').astype('int64')
+
 class Building:
+    """
+    Holds a building's readings in typed contiguous buffers (int64 epoch
+    seconds and float64 kWh) that grow in amortized chunks, so a reading
+    costs 16 bytes and totals and reports are single vectorized reductions.
+    
+    Queries sort the readings by timestamp and build an index (prefix sums,
+    kWh-descending order, hour-of-day totals) once per batch of new readings.
+    Time ranges are half-open [start, end); either bound may be None.
+    """
+    INITIAL_CAPACITY = 1024
+    GROWTH_FACTOR = 1.5
+    
     def __init__(self, name):
         self.name = name
-        self.meter_readings = []
+        self._epoch = np.empty(0, dtype='int64')
+        self._kwh = np.empty(0, dtype='float64')
+        self._size = 0
+        self._indexed = False
+    
+    def __len__(self):
+        return self._size
+    
+    @property
+    def timestamps(self):
+        return self._epoch[:self._size].view('datetime64[s]')
+    
+    @property
+    def kwh(self):
+        return self._kwh[:self._size]
+    
+    @property
+    def meter_readings(self):
+        return [MeterReading(pd.Timestamp(ts), kwh) for ts, kwh in zip(self.timestamps, self.kwh)]
+    
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._kwh)
+        if needed <= capacity:
+            return
+        capacity = max(needed, int(capacity * self.GROWTH_FACTOR), self.INITIAL_CAPACITY)
+        epoch = np.empty(capacity, dtype='int64')
+        kwh = np.empty(capacity, dtype='float64')
+        epoch[:self._size] = self._epoch[:self._size]
+        kwh[:self._size] = self._kwh[:self._size]
+        self._epoch, self._kwh = epoch, kwh
     
     def add_reading(self, reading):
-        self.meter_readings.append(reading)
+        self._reserve(1)
+        self._epoch[self._size] = np.datetime64(reading.timestamp, 's').astype('int64')
+        self._kwh[self._size] = reading.kwh
+        self._size += 1
+        self._indexed = False
+    
+    def add_readings(self, timestamps, kwh):
+        """
+        Appends a block of readings with one copy instead of one object per row.
+        """
+        epoch = np.asarray(timestamps, dtype='datetime64[s]').astype('int64')
+        kwh = np.asarray(kwh, dtype='float64')
+        self._reserve(len(kwh))
+        self._epoch[self._size:self._size + len(kwh)] = epoch
+        self._kwh[self._size:self._size + len(kwh)] = kwh
+        self._size += len(kwh)
+        self._indexed = False
+    
+    def _build_index(self):
+        if self._indexed:
+            return
+        epoch, kwh = self._epoch[:self._size], self._kwh[:self._size]
+        if self._size > 1 and np.any(epoch[1:] < epoch[:-1]):
+            order = np.argsort(epoch, kind='stable')
+            epoch[:] = epoch[order]
+            kwh[:] = kwh[order]
+        self._prefix = np.concatenate([[0.0], np.cumsum(kwh)])
+        self._peak_order = np.argsort(-kwh, kind='stable')
+        self._hours = ((epoch // 3600) % 24).astype('int8')
+        self._hour_sums = np.bincount(self._hours, weights=kwh, minlength=24)
+        self._hour_counts = np.bincount(self._hours, minlength=24)
+        self._indexed = True
+    
+    def _bounds(self, start, end):
+        self._build_index()
+        epoch = self._epoch[:self._size]
+        lo = 0 if start is None else int(np.searchsorted(epoch, _to_epoch(start), 'left'))
+        hi = self._size if end is None else int(np.searchsorted(epoch, _to_epoch(end), 'left'))
+        return lo, max(lo, hi)
+    
+    def _reading(self, i):
+        return MeterReading(pd.Timestamp(self._epoch[i], unit='s'), float(self._kwh[i]))
+    
+    def consumption_between(self, start=None, end=None):
+        """
+        Total kWh in [start, end) from prefix sums, in O(log n).
+        """
+        lo, hi = self._bounds(start, end)
+        return float(self._prefix[hi] - self._prefix[lo])
+    
+    def mean_between(self, start=None, end=None):
+        lo, hi = self._bounds(start, end)
+        if hi == lo:
+            return float('nan')
+        return float(self._prefix[hi] - self._prefix[lo]) / (hi - lo)
+    
+    def peak_readings(self, k=1, start=None, end=None):
+        """
+        The k highest readings, highest first. Over the full history this is
+        O(k) from the precomputed order; within a range it partitions the
+        readings in that range only.
+        """
+        lo, hi = self._bounds(start, end)
+        if lo == 0 and hi == self._size:
+            top = self._peak_order[:k]
+        else:
+            window = self._kwh[lo:hi]
+            k = min(k, len(window))
+            if k == 0:
+                return []
+            top = np.argpartition(-window, k - 1)[:k]
+            top = lo + top[np.argsort(-window[top], kind='stable')]
+        return [self._reading(i) for i in top]
+    
+    def _hourly_totals(self, start=None, end=None):
+        lo, hi = self._bounds(start, end)
+        if lo == 0 and hi == self._size:
+            return self._hour_sums, self._hour_counts
+        hours = self._hours[lo:hi]
+        return (np.bincount(hours, weights=self._kwh[lo:hi], minlength=24),
+                np.bincount(hours, minlength=24))
+    
+    def hourly_profile(self, start=None, end=None):
+        """
+        Mean kWh for each hour of the day (0-23) over [start, end).
+        """
+        sums, counts = self._hourly_totals(start, end)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(sums / counts, index=pd.RangeIndex(24, name='hour'), name='kwh')
     
     def calculate_total_consumption(self):
-        return sum(reading.kwh for reading in self.meter_readings)
+        return float(self.kwh.sum())
     
     def generate_report(self):
         total = self.calculate_total_consumption()
@@ -134,21 +651,65 @@ class BuildingManager:
         return self.buildings.get(name)
     
     def populate_from_dataframe(self, df):
-        for _, row in df.iterrows():
-            building_name = row['building']
+        """
+        Bulk-loads readings: splits the frame by building in one groupby pass
+        and hands each building its timestamp and kWh columns as arrays.
+        """
+        for building_name, group in df.groupby('building', sort=False):
             if building_name not in self.buildings:
                 self.add_building(Building(building_name))
-            reading = MeterReading(row['timestamp'], row['kwh'])
-            self.get_building(building_name).add_reading(reading)
+            self.get_building(building_name).add_readings(
+                group['timestamp'].to_numpy(dtype='datetime64[ns]'),
+                group['kwh'].to_numpy(dtype='float64'),
+            )
+    
+    def consumption_between(self, start=None, end=None):
+        return sum(b.consumption_between(start, end) for b in self.buildings.values())
+    
+    def peak_readings(self, k=1, start=None, end=None):
+        """
+        Campus-wide top-k as (building name, MeterReading) pairs, merged from
+        each building's own top-k.
+        """
+        candidates = [(reading.kwh, name, reading)
+                      for name, building in self.buildings.items()
+                      for reading in building.peak_readings(k, start, end)]
+        return [(name, reading) for _, name, reading in heapq.nlargest(k, candidates, key=lambda c: c[0])]
+    
+    def hourly_profile(self, start=None, end=None):
+        """
+        Campus-wide mean kWh for each hour of the day over [start, end).
+        """
+        sums, counts = np.zeros(24), np.zeros(24)
+        for building in self.buildings.values():
+            building_sums, building_counts = building._hourly_totals(start, end)
+            sums += building_sums
+            counts += building_counts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(sums / counts, index=pd.RangeIndex(24, name='hour'), name='kwh')
 
 # Task 4: Visual Output with Matplotlib
-def create_dashboard(df_combined):
+def hourly_percentile_band(df, low=0.1, high=0.9):
     """
-    Creates a dashboard with three visualizations and saves as PNG.
+    Bins readings by building and hour of day into a 10th/50th/90th
+    percentile band, so the peak-hour panel plots 24 points per building
+    instead of every raw reading.
     """
-    if df_combined.empty:
-        print("No data available for visualization.")
-        return
+    hours = df['timestamp'].dt.hour.rename('hour')
+    band = df.groupby(['building', hours])['kwh'].quantile([low, 0.5, high]).unstack()
+    band.columns = ['low', 'center', 'high']
+    return band
+
+def _dashboard_data(df_combined, rollups=None, binned=False):
+    """
+    Returns (df_daily, avg_weekly, hourly), where hourly is a band table
+    (low/center/high per building and hour) or None for the raw scatter.
+    """
+    if rollups is not None:
+        df_daily = rollups.daily_by_building()
+        df_weekly = rollups.weekly_by_building()
+        hourly = rollups.hourly_profile().rename(columns={'min': 'low', 'mean': 'center', 'max': 'high'})
+        return df_daily, df_weekly.mean(), hourly
     
     df_combined['timestamp'] = pd.to_datetime(df_combined['timestamp'])
     
@@ -160,47 +721,147 @@ def create_dashboard(df_combined):
     # 2. Weekly totals per building and average
     df_weekly = df_combined.groupby([pd.Grouper(key='timestamp', freq='W'), 'building'])['kwh'].sum().unstack()
     avg_weekly = df_weekly.mean()
+    
+    hourly = hourly_percentile_band(df_combined) if binned else None
+    return df_daily, avg_weekly, hourly
 
-    # Create subplots
-    fig, axs = plt.subplots(3, 1, figsize=(12, 18))
-
+def _plot_daily(ax, df_daily):
     # Trend Line: Daily consumption
-    df_daily.plot(ax=axs[0])
-    axs[0].set_title("Daily Consumption Trend by Building")
-    axs[0].set_ylabel("kWh")
-    axs[0].legend(title="Building")
-    axs[0].grid(True)
+    df_daily.plot(ax=ax)
+    ax.set_title("Daily Consumption Trend by Building")
+    ax.set_ylabel("kWh")
+    ax.legend(title="Building")
+    ax.grid(True)
 
+def _plot_weekly(ax, avg_weekly):
     # Bar Chart: Average weekly usage
-    avg_weekly.plot(kind='bar', ax=axs[1], color='skyblue')
-    axs[1].set_title("Average Weekly Usage by Building")
-    axs[1].set_ylabel("kWh")
-    axs[1].grid(axis='y')
+    avg_weekly.plot(kind='bar', ax=ax, color='skyblue')
+    ax.set_title("Average Weekly Usage by Building")
+    ax.set_ylabel("kWh")
+    ax.grid(axis='y')
 
+def _plot_peak_hours(ax, hourly, df_combined=None):
     # Scatter Plot: Peak-hour consumption
-    for building in df_combined['building'].unique():
-        subset = df_combined[df_combined['building'] == building]
-        axs[2].scatter(subset['hour'], subset['kwh'], alpha=0.6, label=building)
-    axs[2].set_title("Peak-Hour Consumption per Building")
-    axs[2].set_xlabel("Hour of Day")
-    axs[2].set_ylabel("kWh")
-    axs[2].legend(title="Building")
-    axs[2].grid(True)
+    if hourly is not None:
+        # Centre line per hour with the band shaded
+        for building, band in hourly.groupby(level='building'):
+            band = band.droplevel('building')
+            line, = ax.plot(band.index, band['center'], marker='o', label=building)
+            ax.fill_between(band.index, band['low'], band['high'], color=line.get_color(), alpha=0.2)
+    else:
+        for building in df_combined['building'].unique():
+            subset = df_combined[df_combined['building'] == building]
+            ax.scatter(subset['hour'], subset['kwh'], alpha=0.6, label=building)
+    ax.set_title("Peak-Hour Consumption per Building")
+    ax.set_xlabel("Hour of Day")
+    ax.set_ylabel("kWh")
+    ax.legend(title="Building")
+    ax.grid(True)
+
+def create_dashboard(df_combined, rollups=None, headless=False):
+    """
+    Creates a dashboard with three visualizations and saves as PNG.
+    If a RollupStore is given, every panel is served from its rollups
+    instead of regrouping the raw readings. In headless mode the figure is
+    drawn on the non-interactive Agg backend, the peak-hour panel is binned
+    into a percentile band, and plt.show() is never called.
+    """
+    if rollups is None and df_combined.empty:
+        print("No data available for visualization.")
+        return
+    
+    if headless:
+        plt.switch_backend('Agg')
+    
+    df_daily, avg_weekly, hourly = _dashboard_data(df_combined, rollups, binned=headless)
+
+    # Create subplots
+    fig, axs = plt.subplots(3, 1, figsize=(12, 18))
+
+    _plot_daily(axs[0], df_daily)
+    _plot_weekly(axs[1], avg_weekly)
+    _plot_peak_hours(axs[2], hourly, df_combined)
 
     # Layout adjustment and save figure
     plt.tight_layout()
     plt.savefig('dashboard.png')
     print("Dashboard saved as dashboard.png")
-    plt.show()
+    if headless:
+        plt.close(fig)
+    else:
+        plt.show()
+
+DASHBOARD_PANELS = {
+    'daily_consumption': (_plot_daily, (12, 6)),
+    'average_weekly_usage': (_plot_weekly, (12, 6)),
+    'peak_hour_consumption': (_plot_peak_hours, (12, 6)),
+}
+
+def _render_panel(name, data, path):
+    """
+    Draws one panel to its own file on the Agg backend.
+    Returns (name, path, wall seconds, peak traced bytes).
+    """
+    plt.switch_backend('Agg')
+    tracemalloc.start()
+    start = time.perf_counter()
+    plot, figsize = DASHBOARD_PANELS[name]
+    fig, ax = plt.subplots(figsize=figsize)
+    plot(ax, data)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return name, str(path), elapsed, peak
+
+def render_dashboard_panels(df_combined, output_dir='.', rollups=None, workers=None):
+    """
+    Headless rendering of each dashboard panel to a separate PNG in
+    output_dir, in a process pool when workers > 1. The panel data is
+    computed once here, so workers only draw. Reports wall-clock time and
+    peak memory per panel.
+    """
+    if rollups is None and df_combined.empty:
+        print("No data available for visualization.")
+        return []
+    
+    df_daily, avg_weekly, hourly = _dashboard_data(df_combined, rollups, binned=True)
+    panel_data = {
+        'daily_consumption': df_daily,
+        'average_weekly_usage': avg_weekly,
+        'peak_hour_consumption': hourly,
+    }
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [(name, data, output_dir / f"{name}.png") for name, data in panel_data.items()]
+    
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_render_panel, *zip(*jobs)))
+    else:
+        results = [_render_panel(*job) for job in jobs]
+    
+    for name, path, elapsed, peak in results:
+        print(f"Rendered {name} to {path} in {elapsed:.2f}s (peak memory {peak / 1e6:.1f} MB)")
+    return results
 
 # Task 5: Persistence and Executive Summary
-def export_data_and_summary(df_combined, building_summary):
+def export_data_and_summary(df_combined, building_summary, export_format='csv', manager=None):
     """
     Exports data and generates a summary report.
+    export_format 'feather' writes the cleaned data as a columnar file that
+    downstream jobs can reload without parsing. If a populated BuildingManager
+    is given, the peak load is read from its index instead of scanning the frame.
     """
     # Export cleaned data
-    df_combined.to_csv('cleaned_energy_data.csv', index=False)
-    print("Exported cleaned data to cleaned_energy_data.csv")
+    if export_format == 'feather':
+        df_combined.reset_index(drop=True).to_feather('cleaned_energy_data.feather')
+        print("Exported cleaned data to cleaned_energy_data.feather")
+    else:
+        df_combined.to_csv('cleaned_energy_data.csv', index=False)
+        print("Exported cleaned data to cleaned_energy_data.csv")
     
     # Export building summary
     building_summary.to_csv('building_summary.csv', index=True)
@@ -209,7 +870,11 @@ def export_data_and_summary(df_combined, building_summary):
     # Generate summary report
     total_campus = df_combined['kwh'].sum()
     highest_building = building_summary['sum'].idxmax() if not building_summary.empty else "N/A"
-    peak_time = df_combined.loc[df_combined['kwh'].idxmax(), 'timestamp'] if not df_combined.empty else "N/A"
+    if manager is not None and manager.buildings:
+        peaks = manager.peak_readings(1)
+        peak_time = peaks[0][1].timestamp if peaks else "N/A"
+    else:
+        peak_time = df_combined.loc[df_combined['kwh'].idxmax(), 'timestamp'] if not df_combined.empty else "N/A"
     
     # Weekly trends: Simple description of averages
     weekly_trends = building_summary['mean'].to_dict() if not building_summary.empty else {}
@@ -227,32 +892,165 @@ Executive Summary:
     print("Summary report saved to summary.txt")
     print(summary_text)  # Also print to console
 
+# Pipeline Instrumentation
+class PipelineInstrumentation:
+    """
+    Records wall time, CPU time, peak RSS, tracemalloc delta and row counts
+    in/out for each pipeline stage. When disabled, stage() only yields a
+    record dict, so leaving the hooks in place costs next to nothing.
+    CPU time covers this process only, not pool workers.
+    """
+    def __init__(self, enabled=False, trace_memory=False, profile_stage=None, profile_path=None):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.profile_stage = profile_stage
+        self.profile_path = profile_path or f"{profile_stage}.prof"
+        self.run_id = datetime.now().isoformat(timespec='seconds')
+        self.records = []
+    
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        if not self.enabled:
+            yield record
+            return
+        
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(self.profile_path)
+                record['profile'] = self.profile_path
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            if resource is not None:
+                # ru_maxrss is in kilobytes on Linux
+                record['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record['traced_delta_mb'] = (current - traced_before) / 1e6
+                record['traced_peak_mb'] = (peak - traced_before) / 1e6
+            self.records.append(record)
+    
+    def write_json(self, path):
+        """
+        Appends one JSON object per stage to path, tagged with this run's id.
+        """
+        with open(path, 'a') as f:
+            for record in self.records:
+                f.write(json.dumps({'run': self.run_id, **record}, default=str) + '\n')
+    
+    def summary_text(self):
+        lines = ["", "Pipeline Stage Metrics:"]
+        for r in self.records:
+            line = f"- {r['stage']}: wall {r['wall_seconds']:.3f}s, cpu {r['cpu_seconds']:.3f}s"
+            if 'peak_rss_mb' in r:
+                line += f", peak RSS {r['peak_rss_mb']:.1f} MB"
+            if 'traced_delta_mb' in r:
+                line += f", traced delta {r['traced_delta_mb']:+.1f} MB (peak {r['traced_peak_mb']:.1f} MB)"
+            line += f", rows in {r['rows_in']}, rows out {r['rows_out']}"
+            lines.append(line)
+        return "\n".join(lines) + "\n"
+
 # Main Execution
 if __name__ == "__main__":
-    data_dir = '/data/'
+    parser = argparse.ArgumentParser(description="Campus energy consumption pipeline")
+    parser.add_argument('--data-dir', default='/data/', help="directory of <building>_<month>.csv files")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="parse files and render panels in a pool of this many processes (default: serial)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="reuse parsed files from this columnar cache when unchanged")
+    parser.add_argument('--export-format', choices=['csv', 'feather'], default='csv',
+                        help="format of the cleaned data export")
+    parser.add_argument('--headless', action='store_true',
+                        help="render on a non-interactive backend without opening a window")
+    parser.add_argument('--panels-dir', default=None,
+                        help="render each dashboard panel to its own file in this directory (headless)")
+    parser.add_argument('--rollup-store', default=None,
+                        help="serve summaries and dashboard from an incremental rollup store at this path")
+    parser.add_argument('--instrument', action='store_true',
+                        help="record per-stage timing and memory and append it to summary.txt")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="also record tracemalloc deltas per stage (slower)")
+    parser.add_argument('--metrics-json', default=None,
+                        help="append per-stage metrics to this JSON-lines file (implies --instrument)")
+    parser.add_argument('--profile-stage', default=None,
+                        choices=['ingest', 'aggregate', 'model', 'dashboard', 'export'],
+                        help="dump a cProfile of this stage (implies --instrument)")
+    parser.add_argument('--profile-out', default=None, help="cProfile output path")
+    args = parser.parse_args()
+    
+    data_dir = args.data_dir
+    instrumentation = PipelineInstrumentation(
+        enabled=args.instrument or bool(args.metrics_json) or bool(args.profile_stage),
+        trace_memory=args.trace_memory,
+        profile_stage=args.profile_stage,
+        profile_path=args.profile_out,
+    )
     
     # Task 1
-    df_combined = ingest_and_validate_data(data_dir)
+    with instrumentation.stage('ingest') as stage:
+        df_combined = ingest_and_validate_data(data_dir, workers=args.workers, cache_dir=args.cache_dir)
+        stage['rows_out'] = len(df_combined)
     
     if df_combined.empty:
         print("No data loaded. Exiting.")
         exit()
     
     # Task 2
-    daily_totals = calculate_daily_totals(df_combined)
-    weekly_aggregates = calculate_weekly_aggregates(df_combined)
-    building_summary = building_wise_summary(df_combined)
+    rollups = None
+    with instrumentation.stage('aggregate', rows_in=len(df_combined)) as stage:
+        if args.rollup_store:
+            rollups = RollupStore(args.rollup_store)
+            merged = rollups.update(df_combined)
+            rollups.save()
+            print(f"Merged {merged} new readings into {args.rollup_store}")
+            daily_totals = rollups.daily_totals()
+            weekly_aggregates = rollups.weekly_totals()
+            building_summary = rollups.building_summary()[['mean', 'min', 'max', 'sum']]
+        else:
+            daily_totals = calculate_daily_totals(df_combined)
+            weekly_aggregates = calculate_weekly_aggregates(df_combined)
+            building_summary = building_wise_summary(df_combined)
+        stage['rows_out'] = len(daily_totals) + len(weekly_aggregates) + len(building_summary)
     
     # Task 3
-    manager = BuildingManager()
-    manager.populate_from_dataframe(df_combined)
+    with instrumentation.stage('model', rows_in=len(df_combined)) as stage:
+        manager = BuildingManager()
+        manager.populate_from_dataframe(df_combined)
+        stage['rows_out'] = sum(len(b) for b in manager.buildings.values())
     
     # Example: Generate report for each building
     for building in manager.buildings.values():
         print(building.generate_report())
     
     # Task 4
-    create_dashboard(df_combined)
+    with instrumentation.stage('dashboard', rows_in=len(df_combined)):
+        if args.panels_dir:
+            render_dashboard_panels(df_combined, args.panels_dir, rollups=rollups, workers=args.workers)
+        else:
+            create_dashboard(df_combined, rollups=rollups, headless=args.headless)
     
     # Task 5
-    export_data_and_summary(df_combined, building_summary)
+    with instrumentation.stage('export', rows_in=len(df_combined)) as stage:
+        export_data_and_summary(df_combined, building_summary, export_format=args.export_format, manager=manager)
+        stage['rows_out'] = len(df_combined)
+    
+    if instrumentation.enabled:
+        metrics_text = instrumentation.summary_text()
+        with open('summary.txt', 'a') as f:
+            f.write(metrics_text)
+        print(metrics_text)
+        if args.metrics_json:
+            instrumentation.write_json(args.metrics_json)
+            print(f"Stage metrics appended to {args.metrics_json}")